@@ -4,42 +4,66 @@ This module provides endpoints for user registration, login, email verification,
 and avatar management.
 """
 
-import logging
+import asyncio
+import time
 from datetime import timedelta
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    UploadFile,
+    status,
+)
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from jose import JWTError, jwt
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from jose import JWTError
 
 from app.core.auth import (
     create_access_token,
     create_refresh_token,
     get_current_active_user,
+    get_current_admin_user,
     get_password_hash,
+    password_needs_rehash,
     verify_password,
     oauth2_scheme,
 )
+from app.core.cache import cache
 from app.core.cloudinary import upload_avatar
 from app.core.config import settings
 from app.core.database import get_db
 from app.core.email import send_verification_email, send_password_reset_email
+from app.core.jwt_cache import decode_token, invalidate_token
 from app.models.user import User
 from app.schemas.auth import Token, UserCreate, UserResponse, PasswordReset, PasswordResetConfirmResponse, PasswordResetRequest, PasswordResetResponse
-from app.core.security import get_current_admin_user
 
 router = APIRouter()
 
+# Verified against when the user doesn't exist so login timing doesn't reveal
+# which emails are registered
+DUMMY_PASSWORD_HASH = get_password_hash("!invalid!")
+
 
 @router.post(
     "/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED
 )
-async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
+async def register(
+    user_data: UserCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
     """Register a new user.
     
+    The verification email is sent after the response has been returned.
+    
     Args:
         user_data (UserCreate): User registration data including email, password, and role.
+        background_tasks (BackgroundTasks): Queue for post-response work.
         db (AsyncSession): Database session.
         
     Returns:
@@ -48,36 +72,33 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     Raises:
         HTTPException: If email is already registered.
     """
-    # Check if user already exists
-    result = await db.execute(select(User).where(User.email == user_data.email))
+    # Create new user; the unique email index rejects duplicates atomically
+    hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
+    stmt = (
+        insert(User)
+        .values(
+            email=user_data.email,
+            hashed_password=hashed_password,
+            is_verified=True,  # Auto-verify in development
+            role=user_data.role,
+        )
+        .on_conflict_do_nothing(index_elements=["email"])
+        .returning(User)
+    )
+    result = await db.execute(stmt)
     db_user = result.scalar_one_or_none()
-    if db_user:
+    if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Email already registered"
         )
-
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
-    db_user = User(
-        email=user_data.email,
-        hashed_password=hashed_password,
-        is_verified=True,  # Auto-verify in development
-        role=user_data.role,
-    )
-    db.add(db_user)
     await db.commit()
-    await db.refresh(db_user)
 
-    # Try to send verification email, but don't fail if it doesn't work
-    try:
-        verification_token = create_access_token(
-            data={"sub": user_data.email}, expires_delta=timedelta(days=1)
-        )
-        send_verification_email(user_data.email, verification_token)
-        logging.info(f"Verification email sent to {user_data.email}")
-    except Exception as e:
-        logging.warning(f"Failed to send verification email: {e}")
-        # Continue without verification in development
+    # Send verification email in the background; send_raw_email logs failures
+    # itself, so registration never fails because of SMTP problems
+    verification_token = create_access_token(
+        data={"sub": user_data.email}, expires_delta=timedelta(days=1)
+    )
+    send_verification_email(background_tasks, user_data.email, verification_token)
 
     return db_user
 
@@ -98,15 +119,34 @@ async def login(
     Raises:
         HTTPException: If credentials are invalid.
     """
-    result = await db.execute(select(User).where(User.email == form_data.username))
-    user = result.scalar_one_or_none()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    result = await db.execute(
+        select(User.email, User.hashed_password).where(
+            User.email == form_data.username
+        )
+    )
+    user = result.one_or_none()
+    hashed_password = user.hashed_password if user else DUMMY_PASSWORD_HASH
+    password_ok = await asyncio.to_thread(
+        verify_password, form_data.password, hashed_password
+    )
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Transparently migrate hashes created with an older scheme
+    if password_needs_rehash(user.hashed_password):
+        new_hash = await asyncio.to_thread(get_password_hash, form_data.password)
+        await db.execute(
+            update(User)
+            .where(User.email == user.email)
+            .values(hashed_password=new_hash)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
     access_token = create_access_token(data={"sub": user.email})
     refresh_token = create_refresh_token(data={"sub": user.email})
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
@@ -127,9 +167,7 @@ async def verify_email(token: str, db: AsyncSession = Depends(get_db)):
         HTTPException: If token is invalid or expired.
     """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(
@@ -142,16 +180,21 @@ async def verify_email(token: str, db: AsyncSession = Depends(get_db)):
             detail="Invalid verification token",
         )
 
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
-    if not user:
+    result = await db.execute(
+        update(User)
+        .where(User.email == email)
+        .values(is_verified=True)
+        .returning(User.id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
 
-    user.is_verified = True
     await db.commit()
+    await cache.delete(f"user:{email}")
     return {"message": "Email verified successfully"}
 
 
@@ -170,11 +213,26 @@ async def update_avatar(
         
     Returns:
         UserResponse: Updated user data.
+        
+    Raises:
+        HTTPException: If the file is larger than ``AVATAR_MAX_SIZE``.
     """
+    # BodySizeLimitMiddleware already refuses bodies much over the limit
+    # before they are spooled; this is the exact check on the file itself
+    if file.size is not None and file.size > settings.AVATAR_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Avatar file is too large",
+        )
+
     avatar_url = await upload_avatar(file)
-    current_user.avatar = avatar_url
+    # current_user may be a detached instance restored from the user cache
+    await db.execute(
+        update(User).where(User.id == current_user.id).values(avatar=avatar_url)
+    )
     await db.commit()
-    await db.refresh(current_user)
+    await cache.delete(f"user:{current_user.email}")
+    current_user.avatar = avatar_url
     return current_user
 
 
@@ -192,63 +250,115 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
 
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
-):
+async def refresh_token(token: str = Depends(oauth2_scheme)):
     """Refresh access token using refresh token.
     
+    Only tokens issued by ``create_refresh_token`` are accepted. Revocation
+    is checked in Redis; if Redis can't be reached the refresh is refused
+    rather than letting a revoked token through. The user row isn't read:
+    the new access token still goes through the active-user check of every
+    authenticated endpoint, so an inactive user gains nothing from it.
+    
     Args:
         token (str): Refresh token.
-        db (AsyncSession): Database session.
         
     Returns:
         Token: New access and refresh tokens.
         
     Raises:
-        HTTPException: If token is invalid or expired.
+        HTTPException: If token is invalid, expired or revoked, or if the
+            revocation list is unavailable.
     """
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid refresh token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        payload = decode_token(token)
     except JWTError:
+        raise invalid_token
+
+    email: str = payload.get("sub")
+    jti = payload.get("jti")
+    # Access, verification and reset tokens are signed with the same key
+    if email is None or jti is None or payload.get("type") != "refresh":
+        raise invalid_token
+
+    try:
+        revoked = await cache.redis.exists(f"revoked_jti:{jti}")
+    except Exception:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid refresh token",
-            headers={"WWW-Authenticate": "Bearer"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token revocation check is unavailable",
         )
-
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
-    if not user:
+    if revoked:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
+            detail="Refresh token has been revoked",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(data={"sub": user.email})
-    refresh_token = create_refresh_token(data={"sub": user.email})
+    access_token = create_access_token(data={"sub": email})
+    refresh_token = create_refresh_token(data={"sub": email})
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
+@router.post("/logout")
+async def logout(token: str = Depends(oauth2_scheme)):
+    """Revoke a refresh token.
+    
+    Args:
+        token (str): Refresh token to revoke.
+        
+    Returns:
+        dict: Success message.
+        
+    Raises:
+        HTTPException: If token is invalid, expired or not a refresh token,
+            or if the revocation can't be stored.
+    """
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = decode_token(token)
+    except JWTError:
+        raise invalid_token
+
+    jti = payload.get("jti")
+    if jti is None or payload.get("type") != "refresh":
+        raise invalid_token
+
+    # Keep the revocation only as long as the token could still be used
+    ttl = int(payload["exp"] - time.time())
+    if ttl > 0:
+        try:
+            await cache.redis.set(f"revoked_jti:{jti}", b"1", ex=ttl)
+        except Exception:
+            # Refresh fails closed on the same error; don't claim a logout
+            # that didn't happen
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Token revocation is unavailable",
+            )
+    invalidate_token(token)
+    return {"message": "Successfully logged out"}
+
+
 @router.post("/request-password-reset", response_model=PasswordResetResponse)
 async def request_password_reset(
     reset_request: PasswordResetRequest,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """Request password reset by email."""
     # Get user from database
-    stmt = select(User).where(User.email == reset_request.email)
+    stmt = select(User.email).where(User.email == reset_request.email)
     result = await db.execute(stmt)
-    user = result.scalar_one_or_none()
+    user = result.one_or_none()
 
     if not user:
         # Return success even if user doesn't exist to prevent email enumeration
@@ -260,8 +370,9 @@ async def request_password_reset(
         expires_delta=timedelta(minutes=60),  # 1 hour expiration
     )
 
-    # Send reset email
-    await send_password_reset_email(
+    # Send reset email after the response has been returned
+    send_password_reset_email(
+        background_tasks,
         email=user.email,
         reset_token=reset_token,
     )
@@ -277,11 +388,7 @@ async def reset_password(
     """Reset password using reset token."""
     try:
         # Verify reset token
-        payload = jwt.decode(
-            reset_data.token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
+        payload = decode_token(reset_data.token)
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(
@@ -289,20 +396,26 @@ async def reset_password(
                 detail="Invalid reset token",
             )
 
-        # Get user from database
-        stmt = select(User).where(User.email == email)
-        result = await db.execute(stmt)
-        user = result.scalar_one_or_none()
+        # Update password
+        hashed_password = await asyncio.to_thread(
+            get_password_hash, reset_data.new_password
+        )
+        result = await db.execute(
+            update(User)
+            .where(User.email == email)
+            .values(hashed_password=hashed_password)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
 
-        if user is None:
+        if result.scalar_one_or_none() is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="User not found",
             )
 
-        # Update password
-        user.hashed_password = get_password_hash(reset_data.new_password)
         await db.commit()
+        await cache.delete(f"user:{email}")
 
         return PasswordResetConfirmResponse()
 
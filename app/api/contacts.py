@@ -4,22 +4,166 @@ This module provides endpoints for managing contacts, including CRUD operations,
 search, and birthday tracking.
 """
 
+import hashlib
 import logging
+import time
 from datetime import date, timedelta
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import or_, select
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Text, and_, bindparam, cast, delete, func, literal, literal_column, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, raiseload
 
 from app.core.auth import get_current_active_user
 from app.core.cache import cache
-from app.core.database import get_db
+from app.core.database import async_session, get_db
 from app.models import contact as models
 from app.models.user import User
 from app.schemas import contact as schemas
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip when streaming an export
+EXPORT_CHUNK_SIZE = 500
+
+# Columns exposed by the Contact schema; list endpoints load only these and
+# refuse any relationship lazy load
+CONTACT_COLUMNS = (
+    models.Contact.id,
+    models.Contact.first_name,
+    models.Contact.last_name,
+    models.Contact.email,
+    models.Contact.phone,
+    models.Contact.birthday,
+    models.Contact.additional_data,
+    models.Contact.created_at,
+    models.Contact.updated_at,
+)
+
+# Matches the expression of the ix_contact_search_trgm GIN index. Don't wrap
+# it in lower() or concat_ws(): the index would no longer apply, and the
+# trigram opclass already handles ILIKE. coalesce() keeps a NULL column from
+# turning the whole string NULL.
+# The constants are literal SQL, not bind parameters: a $n placeholder
+# wouldn't match the index expression in prepared or generic plans.
+_EMPTY = literal_column("''")
+_SPACE = literal_column("' '")
+SEARCH_TEXT = (
+    func.coalesce(models.Contact.first_name, _EMPTY)
+    + _SPACE
+    + func.coalesce(models.Contact.last_name, _EMPTY)
+    + _SPACE
+    + func.coalesce(models.Contact.email, _EMPTY)
+)
+
+
+def birthday_window(start: date, days: int):
+    """Build a filter for birthdays falling within ``days`` days of ``start``.
+    
+    Uses half-open ranges on the indexed ``birthday_md`` MMDD column. When
+    the window crosses the new year it is split into two ranges.
+    
+    Args:
+        start (date): First day of the window.
+        days (int): Length of the window in days, counted after ``start``.
+        
+    Returns:
+        ColumnElement: SQL filter expression.
+    """
+    end = start + timedelta(days=days)
+    start_md = start.month * 100 + start.day
+    end_md = end.month * 100 + end.day
+    birthday_md = models.Contact.birthday_md
+    if start_md <= end_md:
+        return and_(birthday_md >= start_md, birthday_md < end_md + 1)
+    return or_(birthday_md >= start_md, birthday_md < end_md + 1)
+
+
+async def _contacts_version(db: AsyncSession, user_id: int) -> str:
+    """Get a watermark that changes whenever the user's contacts change.
+    
+    The version is a per-user counter in Redis that every write bumps with
+    ``INCR``. A missing counter is seeded from the clock with ``SET NX``, so
+    it never reuses an earlier value and concurrent readers agree on one
+    seed. Unlike caching a computed version, a read racing a write can't
+    store a stale value after the write. If Redis is unavailable the version
+    falls back to the contact count and latest ``updated_at``.
+    
+    Args:
+        db (AsyncSession): Database session.
+        user_id (int): Owner of the contacts.
+        
+    Returns:
+        str: Version of the user's contact list.
+    """
+    cache_key = f"contacts_version:{user_id}"
+    try:
+        async with cache.redis.pipeline(transaction=False) as pipe:
+            pipe.set(cache_key, time.time_ns(), nx=True)
+            pipe.get(cache_key)
+            _, version = await pipe.execute()
+        return version.decode()
+    except Exception as e:
+        logger.error(f"Error reading contacts version for user {user_id}: {e}")
+
+    stmt = select(
+        func.count(models.Contact.id), func.max(models.Contact.updated_at)
+    ).where(models.Contact.user_id == user_id)
+    count, last_updated = (await db.execute(stmt)).one()
+    return f"{count}-{last_updated.timestamp() if last_updated else 0}"
+
+
+async def _bump_contacts_version(user_id: int) -> None:
+    """Move the user's contacts version on, invalidating cached lists and ETags.
+    
+    Args:
+        user_id (int): Owner of the contacts.
+    """
+    cache_key = f"contacts_version:{user_id}"
+    try:
+        # Seed first so INCR never restarts a lost counter at 1
+        async with cache.redis.pipeline(transaction=False) as pipe:
+            pipe.set(cache_key, time.time_ns(), nx=True)
+            pipe.incr(cache_key)
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Error bumping contacts version for user {user_id}: {e}")
+
+
+def _constraint_name(error: IntegrityError) -> Optional[str]:
+    """Get the name of the constraint an ``IntegrityError`` violated."""
+    # The driver's own exception is chained behind SQLAlchemy's DBAPI adapter
+    return getattr(error.orig.__cause__, "constraint_name", None)
+
+
+def _etag(*parts) -> str:
+    """Build a strong ETag from the given parts."""
+    digest = hashlib.sha1(":".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def _etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Check whether an ``If-None-Match`` header matches ``etag``.
+    
+    Uses the weak comparison RFC 9110 requires for ``If-None-Match``: a
+    ``W/`` prefix is ignored, and ``*`` matches any current representation.
+    """
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _to_cache(contacts):
+    """Convert ORM contacts into JSON-serializable dicts for the cache."""
+    if isinstance(contacts, models.Contact):
+        return schemas.Contact.model_validate(contacts).model_dump(mode="json")
+    return [_to_cache(contact) for contact in contacts]
 
 
 @router.post("/", response_model=schemas.Contact, status_code=201)
@@ -41,87 +185,190 @@ async def create_contact(
     Raises:
         HTTPException: If contact with same email already exists.
     """
-    # Check if contact with same email already exists for this user
-    stmt = select(models.Contact).where(
-        models.Contact.email == contact.email,
-        models.Contact.user_id == current_user.id,
+    # The unique (user_id, email) index rejects duplicates in the same statement
+    stmt = (
+        insert(models.Contact)
+        .values(**contact.model_dump(), user_id=current_user.id)
+        .on_conflict_do_nothing(index_elements=["user_id", "email"])
+        .returning(models.Contact)
     )
     result = await db.execute(stmt)
-    existing_contact = result.scalar_one_or_none()
+    db_contact = result.scalar_one_or_none()
 
-    if existing_contact:
+    if db_contact is None:
         raise HTTPException(
             status_code=400, detail="Contact with this email already exists"
         )
 
-    db_contact = models.Contact(**contact.model_dump(), user_id=current_user.id)
-    db.add(db_contact)
     await db.commit()
-    await db.refresh(db_contact)
     
-    # Clear cache for user's contacts
-    await cache.delete(f"contacts:{current_user.id}")
+    # A new version invalidates the user's cached contact lists
+    await _bump_contacts_version(current_user.id)
+    await cache.delete(f"birthdays:{current_user.id}")
     return db_contact
 
 
 @router.get("/", response_model=List[schemas.Contact])
 async def read_contacts(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[int] = None,
     search: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """Get list of contacts with optional search and pagination.
     
+    Contacts are ordered by ID. Passing ``cursor`` (the ``X-Next-Cursor``
+    header of the previous page) uses keyset pagination, whose cost doesn't
+    grow with the page number the way ``skip`` does.
+    
+    The response carries an ``ETag``; sending it back in ``If-None-Match``
+    returns 304 Not Modified while the user's contacts are unchanged.
+    
     Args:
-        skip (int): Number of records to skip.
+        response (Response): Outgoing response, used to set the cursor header.
+        skip (int): Number of records to skip. Ignored when ``cursor`` is set.
         limit (int): Maximum number of records to return.
+        cursor (Optional[int]): Return only contacts with an ID above this one.
         search (Optional[str]): Search term for filtering contacts.
+        if_none_match (Optional[str]): ETag of a previously fetched page.
         db (AsyncSession): Database session.
         current_user (User): Authenticated user.
         
     Returns:
         List[Contact]: List of contacts matching the criteria.
     """
-    # Generate cache key
-    cache_key = f"contacts:{current_user.id}:{skip}:{limit}:{search}"
+    version = await _contacts_version(db, current_user.id)
+    etag = _etag(version, skip, limit, cursor, search)
+    if _etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    # Keying on the version means writes never leave a stale page behind
+    cache_key = f"contacts:{current_user.id}:{version}:{skip}:{limit}:{cursor}:{search}"
     
-    # Try to get from cache
-    cached_contacts = await cache.get(cache_key)
-    if cached_contacts:
-        return cached_contacts
+    # The list key holds only contact IDs; the contacts themselves are
+    # cached individually and hydrated in one round trip
+    cached_ids = await cache.get(cache_key)
+    if cached_ids:
+        cached_contacts = await cache.mget(
+            [f"contact:{contact_id}:{current_user.id}" for contact_id in cached_ids]
+        )
+        if all(contact is not None for contact in cached_contacts):
+            if len(cached_contacts) == limit:
+                response.headers["X-Next-Cursor"] = str(cached_contacts[-1]["id"])
+            return cached_contacts
 
-    stmt = select(models.Contact).where(models.Contact.user_id == current_user.id)
+    stmt = (
+        select(models.Contact)
+        .options(load_only(*CONTACT_COLUMNS), raiseload("*"))
+        .where(models.Contact.user_id == current_user.id)
+    )
 
     if search:
         stmt = stmt.where(
-            or_(
-                models.Contact.first_name.ilike(f"%{search}%"),
-                models.Contact.last_name.ilike(f"%{search}%"),
-                models.Contact.email.ilike(f"%{search}%"),
-            )
+            SEARCH_TEXT.ilike(bindparam("search_pattern", f"%{search}%"))
         )
 
-    stmt = stmt.offset(skip).limit(limit)
+    if cursor is not None:
+        stmt = stmt.where(models.Contact.id > cursor)
+    else:
+        stmt = stmt.offset(skip)
+
+    stmt = stmt.order_by(models.Contact.id).limit(limit)
     result = await db.execute(stmt)
     contacts = result.scalars().all()
+
+    if len(contacts) == limit:
+        response.headers["X-Next-Cursor"] = str(contacts[-1].id)
     
     # Cache the results
-    await cache.set(cache_key, contacts)
+    await cache.mset(
+        {
+            f"contact:{contact.id}:{current_user.id}": _to_cache(contact)
+            for contact in contacts
+        }
+    )
+    await cache.set(cache_key, [contact.id for contact in contacts])
     return contacts
 
 
+async def _stream_contacts_json(user_id: int):
+    """Yield the user's contacts as a JSON array, one chunk of rows at a time.
+    
+    Uses its own session: dependency sessions are closed before a streaming
+    response body is sent.
+    
+    Args:
+        user_id (int): Owner of the contacts.
+        
+    Yields:
+        bytes: Pieces of the JSON array.
+    """
+    contact_json = func.json_build_object(
+        *(
+            item
+            for column in CONTACT_COLUMNS
+            for item in (literal(column.key), column)
+        )
+    )
+    stmt = (
+        select(cast(contact_json, Text))
+        .where(models.Contact.user_id == user_id)
+        .order_by(models.Contact.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    separator = b"["
+    async with async_session() as session:
+        result = await session.stream_scalars(stmt)
+        async for rows in result.partitions():
+            yield separator + ",".join(rows).encode()
+            separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
+@router.get("/export", response_model=None, response_class=StreamingResponse)
+async def export_contacts(
+    current_user: User = Depends(get_current_active_user),
+):
+    """Get all contacts of the current user as one JSON array.
+    
+    Each object is built by PostgreSQL and the rows are read through a
+    server-side cursor, so memory use is bounded by ``EXPORT_CHUNK_SIZE``
+    rows instead of the size of the result. Objects have the same fields as
+    the Contact schema.
+    
+    Args:
+        current_user (User): Authenticated user.
+        
+    Returns:
+        StreamingResponse: JSON array of contacts ordered by ID.
+    """
+    return StreamingResponse(
+        _stream_contacts_json(current_user.id), media_type="application/json"
+    )
+
+
 @router.get("/{contact_id}", response_model=schemas.Contact)
 async def read_contact(
     contact_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """Get a specific contact by ID.
     
+    The response carries an ``ETag``; sending it back in ``If-None-Match``
+    returns 304 Not Modified while the contact is unchanged.
+    
     Args:
         contact_id (int): ID of the contact to retrieve.
+        response (Response): Outgoing response, used to set the ETag header.
+        if_none_match (Optional[str]): ETag of a previously fetched contact.
         db (AsyncSession): Database session.
         current_user (User): Authenticated user.
         
@@ -135,23 +382,23 @@ async def read_contact(
     cache_key = f"contact:{contact_id}:{current_user.id}"
     
     # Try to get from cache
-    cached_contact = await cache.get(cache_key)
-    if cached_contact:
-        return cached_contact
+    contact_data = await cache.get(cache_key)
+    if not contact_data:
+        # Primary-key lookup; served from the identity map when already loaded
+        db_contact = await db.get(models.Contact, contact_id)
+        
+        if db_contact is None or db_contact.user_id != current_user.id:
+            raise HTTPException(status_code=404, detail="Contact not found")
+        
+        # Cache the result
+        contact_data = _to_cache(db_contact)
+        await cache.set(cache_key, contact_data)
 
-    stmt = select(models.Contact).where(
-        models.Contact.id == contact_id,
-        models.Contact.user_id == current_user.id,
-    )
-    result = await db.execute(stmt)
-    db_contact = result.scalar_one_or_none()
-    
-    if db_contact is None:
-        raise HTTPException(status_code=404, detail="Contact not found")
-    
-    # Cache the result
-    await cache.set(cache_key, db_contact)
-    return db_contact
+    etag = _etag(contact_data["id"], contact_data["updated_at"])
+    if _etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return contact_data
 
 
 @router.put("/{contact_id}", response_model=schemas.Contact)
@@ -173,31 +420,56 @@ async def update_contact(
         Contact: Updated contact data.
         
     Raises:
-        HTTPException: If contact is not found.
+        HTTPException: If contact is not found or the new email is already used.
     """
-    stmt = select(models.Contact).where(
-        models.Contact.id == contact_id,
-        models.Contact.user_id == current_user.id,
+    values = contact.model_dump(exclude_unset=True)
+    if not values:
+        # Nothing to change: don't invalidate the user's cached lists and ETags
+        result = await db.execute(
+            select(models.Contact).where(
+                models.Contact.id == contact_id,
+                models.Contact.user_id == current_user.id,
+            )
+        )
+        db_contact = result.scalar_one_or_none()
+        if db_contact is None:
+            raise HTTPException(status_code=404, detail="Contact not found")
+        return db_contact
+
+    stmt = (
+        update(models.Contact)
+        .where(
+            models.Contact.id == contact_id,
+            models.Contact.user_id == current_user.id,
+        )
+        .values(**values)
+        .returning(models.Contact)
+        .execution_options(synchronize_session=False)
     )
-    result = await db.execute(stmt)
+    try:
+        result = await db.execute(stmt)
+    except IntegrityError as e:
+        await db.rollback()
+        if _constraint_name(e) != "ix_contact_user_email":
+            raise
+        raise HTTPException(
+            status_code=400, detail="Contact with this email already exists"
+        )
     db_contact = result.scalar_one_or_none()
     
     if db_contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
 
-    for key, value in contact.model_dump(exclude_unset=True).items():
-        setattr(db_contact, key, value)
-
     await db.commit()
-    await db.refresh(db_contact)
     
     # Clear relevant caches
     await cache.delete(f"contact:{contact_id}:{current_user.id}")
-    await cache.delete(f"contacts:{current_user.id}")
+    await _bump_contacts_version(current_user.id)
+    await cache.delete(f"birthdays:{current_user.id}")
     return db_contact
 
 
-@router.delete("/{contact_id}")
+@router.delete("/{contact_id}", status_code=204, response_class=Response)
 async def delete_contact(
     contact_id: int,
     db: AsyncSession = Depends(get_db),
@@ -211,28 +483,32 @@ async def delete_contact(
         current_user (User): Authenticated user.
         
     Returns:
-        dict: Success message.
+        Response: Empty 204 No Content response.
         
     Raises:
         HTTPException: If contact is not found.
     """
-    stmt = select(models.Contact).where(
-        models.Contact.id == contact_id,
-        models.Contact.user_id == current_user.id,
+    stmt = (
+        delete(models.Contact)
+        .where(
+            models.Contact.id == contact_id,
+            models.Contact.user_id == current_user.id,
+        )
+        .returning(models.Contact.id)
+        .execution_options(synchronize_session=False)
     )
     result = await db.execute(stmt)
-    db_contact = result.scalar_one_or_none()
     
-    if db_contact is None:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Contact not found")
 
-    await db.delete(db_contact)
     await db.commit()
     
     # Clear relevant caches
     await cache.delete(f"contact:{contact_id}:{current_user.id}")
-    await cache.delete(f"contacts:{current_user.id}")
-    return {"message": "Contact deleted successfully"}
+    await _bump_contacts_version(current_user.id)
+    await cache.delete(f"birthdays:{current_user.id}")
+    return Response(status_code=204)
 
 
 @router.get("/birthdays/upcoming", response_model=List[schemas.Contact])
@@ -254,27 +530,20 @@ async def get_upcoming_birthdays(
     
     # Try to get from cache
     cached_birthdays = await cache.get(cache_key)
-    if cached_birthdays:
+    if cached_birthdays is not None:
         return cached_birthdays
 
-    today = date.today()
-    next_week = today + timedelta(days=7)
-
-    stmt = select(models.Contact).where(models.Contact.user_id == current_user.id)
+    stmt = (
+        select(models.Contact)
+        .options(load_only(*CONTACT_COLUMNS), raiseload("*"))
+        .where(
+            models.Contact.user_id == current_user.id,
+            birthday_window(date.today(), days=7),
+        )
+    )
     result = await db.execute(stmt)
-    contacts = result.scalars().all()
-    
-    upcoming_birthdays = []
-
-    for contact in contacts:
-        # Adjust birthday to current year for comparison
-        birthday_this_year = contact.birthday.replace(year=today.year)
-        if birthday_this_year < today:
-            birthday_this_year = birthday_this_year.replace(year=today.year + 1)
-
-        if today <= birthday_this_year <= next_week:
-            upcoming_birthdays.append(contact)
+    upcoming_birthdays = result.scalars().all()
 
     # Cache the results with a shorter expiration time (1 hour)
-    await cache.set(cache_key, upcoming_birthdays, expire=3600)
+    await cache.set(cache_key, _to_cache(upcoming_birthdays), expire=3600)
     return upcoming_birthdays
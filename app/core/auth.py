@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime, timedelta, UTC
 from typing import Optional
 
@@ -8,12 +9,21 @@ from passlib.context import CryptContext
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import cache
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.jwt_cache import decode_token
 from app.models.user import User, UserRole
 from app.schemas.auth import TokenData
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt_sha256 pre-hashes the password so bcrypt's 72-byte input limit doesn't
+# silently truncate it; plain bcrypt hashes still verify and are upgraded on login
+pwd_context = CryptContext(
+    schemes=["bcrypt_sha256", "bcrypt"],
+    deprecated="auto",
+    bcrypt_sha256__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 
@@ -27,6 +37,38 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _user_to_cache(user: User) -> dict:
+    """Serialize the user fields needed by the auth dependencies."""
+    return {
+        "id": user.id,
+        "email": user.email,
+        "is_active": user.is_active,
+        "is_verified": user.is_verified,
+        "role": user.role,
+        "avatar": user.avatar,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+    }
+
+
+def _user_from_cache(data: dict) -> User:
+    """Build a detached user from a cached payload."""
+    created_at = data.get("created_at")
+    return User(
+        id=data["id"],
+        email=data["email"],
+        is_active=data["is_active"],
+        is_verified=data["is_verified"],
+        role=UserRole(data["role"]) if data.get("role") else None,
+        avatar=data.get("avatar"),
+        created_at=datetime.fromisoformat(created_at) if created_at else None,
+    )
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check whether a hash uses a deprecated scheme or outdated settings."""
+    return pwd_context.needs_update(hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create an access token."""
     to_encode = data.copy()
@@ -42,32 +84,46 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a refresh token."""
+    """Create a refresh token with a unique ``jti`` and a ``type`` claim."""
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(UTC) + expires_delta
     else:
         expire = datetime.now(UTC) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire})
+    # jti lets a single refresh token be revoked on logout; type keeps other
+    # tokens signed with the same key from being used to refresh
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "type": "refresh"})
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return encoded_jwt
 
 
+async def get_user_by_email(email: str, db: AsyncSession) -> Optional[User]:
+    """Get a user by email."""
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalar_one_or_none()
+
+
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
 ) -> User:
-    """Get the current user from the token."""
+    """Get the current user from the token.
+
+    The user row is cached in Redis for ``USER_CACHE_EXPIRE_SECONDS`` so that
+    authenticated requests don't need a database round-trip, and concurrent
+    misses for the same user are collapsed into one query. Cached users are
+    detached from the session; endpoints that modify the user must invalidate
+    the ``user:{email}`` key.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -75,12 +131,24 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    result = await db.execute(select(User).where(User.email == token_data.email))
-    user = result.scalar_one_or_none()
-    
-    if user is None:
+    loaded_user = None
+
+    async def load_user() -> Optional[dict]:
+        nonlocal loaded_user
+        loaded_user = await get_user_by_email(token_data.email, db)
+        return _user_to_cache(loaded_user) if loaded_user else None
+
+    # Single-flight: concurrent requests for the same user share one query
+    cached_user = await cache.get_or_set(
+        f"user:{token_data.email}",
+        load_user,
+        expire=settings.USER_CACHE_EXPIRE_SECONDS,
+    )
+    if cached_user is None:
         raise credentials_exception
-    return user
+    if loaded_user is not None:
+        return loaded_user
+    return _user_from_cache(cached_user)
 
 
 async def get_current_active_user(
@@ -103,7 +171,3 @@ async def get_current_admin_user(
         )
     return current_user
 
-
-async def get_user_by_email(email: str, db: AsyncSession) -> Optional[User]:
-    result = await db.execute(select(User).where(User.email == email))
-    return result.scalar_one_or_none()
@@ -0,0 +1,78 @@
+"""ASGI request body size limiting middleware.
+
+Limits are matched on path prefixes before routing, so an oversized upload
+is refused before Starlette spools the multipart body to memory or disk.
+"""
+
+from typing import Dict
+
+import orjson
+from starlette.exceptions import HTTPException
+
+
+class BodySizeLimitMiddleware:
+    """Reject request bodies larger than a limit on a path prefix.
+
+    A ``Content-Length`` over the limit is refused before the body is read.
+    Chunked or understated bodies are counted while they stream in, and the
+    request fails with 413 as soon as the limit is crossed.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        """Initialize the middleware.
+
+        Args:
+            app: Wrapped ASGI application.
+            limits: Path prefix mapped to the maximum body size in bytes.
+        """
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        for prefix, limit in self.limits.items():
+            # Match whole path segments, like the rate limiter
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                break
+        else:
+            return await self.app(scope, receive, send)
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > limit:
+                    return await self._reject(send)
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI re-raises HTTPExceptions from body parsing as-is
+                    raise HTTPException(
+                        status_code=413, detail="Request body is too large"
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _reject(self, send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": orjson.dumps({"detail": "Request body is too large"}),
+            }
+        )
@@ -1,23 +1,45 @@
-import json
+import asyncio
 import logging
-from typing import Any, Optional
+import secrets
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
+import orjson
 import redis.asyncio as redis
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Single-flight lock lifetime; also how long waiters poll before loading themselves
+LOCK_TIMEOUT_SECONDS = 5
+LOCK_POLL_MAX_DELAY = 0.2
+
+# Delete the lock only if it still holds our token: after it expires another
+# caller may own it, and a plain DEL would release their lock
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
 class RedisCache:
     def __init__(self):
         """Initialize Redis connection."""
         try:
-            self.redis = redis.from_url(
+            # One bounded pool shared by the cache and the rate limiter;
+            # callers wait for a free connection instead of failing on spikes
+            self.pool = redis.BlockingConnectionPool.from_url(
                 f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}",
                 password=settings.REDIS_PASSWORD,
                 db=settings.REDIS_DB,
-                encoding="utf-8",
-                decode_responses=True,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                timeout=settings.REDIS_POOL_TIMEOUT,
+                health_check_interval=30,
+                # orjson parses bytes directly, so skip the utf-8 decode
+                decode_responses=False,
             )
+            self.redis = redis.Redis(connection_pool=self.pool)
+            self._release_lock = self.redis.register_script(RELEASE_LOCK_SCRIPT)
             logger.info("Redis cache initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Redis cache: {e}")
@@ -35,7 +57,7 @@ class RedisCache:
         try:
             value = await self.redis.get(key)
             if value:
-                return json.loads(value)
+                return orjson.loads(value)
             return None
         except Exception as e:
             logger.error(f"Error getting value from cache for key {key}: {e}")
@@ -55,12 +77,118 @@ class RedisCache:
         try:
             if expire is None:
                 expire = settings.REDIS_CACHE_EXPIRE_MINUTES * 60
-            await self.redis.set(key, json.dumps(value), ex=expire)
+            await self.redis.set(key, orjson.dumps(value), ex=expire)
             return True
         except Exception as e:
             logger.error(f"Error setting value in cache for key {key}: {e}")
             return False
 
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values from cache in a single round trip.
+        
+        Args:
+            keys: Cache keys to retrieve.
+            
+        Returns:
+            List[Optional[Any]]: Cached values in the order of ``keys``,
+                None for missing keys.
+        """
+        if not keys:
+            return []
+        try:
+            values = await self.redis.mget(keys)
+            return [orjson.loads(value) if value else None for value in values]
+        except Exception as e:
+            logger.error(f"Error getting values from cache for keys {keys}: {e}")
+            return [None] * len(keys)
+
+    async def mset(self, mapping: Dict[str, Any], expire: Optional[int] = None) -> bool:
+        """Set several values in cache in a single round trip.
+        
+        Args:
+            mapping: Cache keys and the values to store under them.
+            expire: Optional expiration time in seconds.
+            
+        Returns:
+            bool: True if successful, False otherwise.
+        """
+        if not mapping:
+            return True
+        try:
+            if expire is None:
+                expire = settings.REDIS_CACHE_EXPIRE_MINUTES * 60
+            # MSET has no expiry option, so pipeline plain SETs instead
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    pipe.set(key, orjson.dumps(value), ex=expire)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error setting values in cache for keys {list(mapping)}: {e}")
+            return False
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        expire: Optional[int] = None,
+    ) -> Optional[Any]:
+        """Get value from cache, loading it once across concurrent callers.
+        
+        On a miss, callers race for a ``SET NX`` lock on ``lock:{key}`` holding
+        a random token. The winner runs ``loader``, caches its result and
+        releases the lock only if it still owns it. The others poll the cache
+        with exponential backoff, and call ``loader`` themselves once the lock
+        is gone without a value (the loader returned None or raised) or no
+        value appears within ``LOCK_TIMEOUT_SECONDS``.
+        
+        Args:
+            key: Cache key to retrieve.
+            loader: Coroutine function producing the value on a miss.
+                A None result is returned but not cached.
+            expire: Optional expiration time in seconds.
+            
+        Returns:
+            Optional[Any]: Cached or freshly loaded value.
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        lock_key = f"lock:{key}"
+        token = secrets.token_hex(16).encode()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + LOCK_TIMEOUT_SECONDS
+        delay = 0.01
+        while True:
+            try:
+                acquired = await self.redis.set(
+                    lock_key, token, nx=True, ex=LOCK_TIMEOUT_SECONDS
+                )
+            except Exception as e:
+                logger.error(f"Error acquiring cache lock for key {key}: {e}")
+                return await loader()
+
+            if acquired:
+                try:
+                    value = await loader()
+                    if value is not None:
+                        await self.set(key, value, expire=expire)
+                    return value
+                finally:
+                    try:
+                        await self._release_lock(keys=[lock_key], args=[token])
+                    except Exception as e:
+                        logger.error(f"Error releasing cache lock for key {key}: {e}")
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LOCK_POLL_MAX_DELAY)
+            value = await self.get(key)
+            if value is not None:
+                return value
+            if loop.time() >= deadline or not await self.exists(lock_key):
+                return await loader()
+
     async def delete(self, key: str) -> bool:
         """Delete value from cache by key.
         
@@ -105,5 +233,10 @@ class RedisCache:
             logger.error(f"Error clearing cache: {e}")
             return False
 
+    async def close(self) -> None:
+        """Close the client and disconnect all pooled connections."""
+        await self.redis.aclose()
+        await self.pool.disconnect()
+
 # Create a singleton instance
 cache = RedisCache() 
\ No newline at end of file
@@ -1,5 +1,8 @@
+import asyncio
+
 import cloudinary
 import cloudinary.uploader
+import cloudinary.utils
 from fastapi import HTTPException, UploadFile
 
 from app.core.config import settings
@@ -10,11 +13,32 @@ cloudinary.config(
     api_secret=settings.CLOUDINARY_API_SECRET,
 )
 
+# The SDK shares one keep-alive pool per host, but it holds a single
+# connection, so concurrent uploads from worker threads discard theirs and
+# handshake again. Keep enough connections for parallel uploads.
+#
+# The SDK has no setting for the pool size, so this replaces the private
+# _http. call_api() reads that module global on every request, so swapping
+# it at import time is enough. test_upload_connection_pool_size fails if an
+# SDK upgrade stops honouring it.
+cloudinary.uploader._http = cloudinary.utils.get_http_connector(
+    cloudinary.config(),
+    {**cloudinary.CERT_KWARGS, "maxsize": settings.CLOUDINARY_POOL_MAXSIZE},
+)
+
 
 async def upload_avatar(file: UploadFile) -> str:
     try:
-        result = cloudinary.uploader.upload(
-            file.file, folder="avatars", resource_type="auto"
+        # Earlier reads (e.g. size checks) may have moved the file position
+        await asyncio.to_thread(file.file.seek, 0)
+        # The Cloudinary SDK is blocking, so run the upload in a worker thread.
+        # Avatars are capped at AVATAR_MAX_SIZE (5 MiB), below Cloudinary's
+        # 6 MB chunk size; the chunked upload_large path would buy nothing.
+        result = await asyncio.to_thread(
+            cloudinary.uploader.upload,
+            file.file,
+            folder="avatars",
+            resource_type="auto",
         )
         return result["secure_url"]
     except Exception as e:
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import EmailStr
 
@@ -7,33 +8,55 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Contact API"
     VERSION: str = "1.0.0"
     API_V1_STR: str = "/api/v1"
+    # "dev" creates missing tables on startup; elsewhere run Alembic migrations
+    ENV: str = "dev"
 
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
+    DB_POOL_TIMEOUT: int = 5
+    DB_POOL_RECYCLE: int = 1800
+    DB_STATEMENT_CACHE_SIZE: int = 512
 
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # bcrypt work factor; cost doubles with every round
+    BCRYPT_ROUNDS: int = 12
 
     # Email
     SMTP_SERVER: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
     SMTP_USERNAME: EmailStr
     SMTP_PASSWORD: str
+    SMTP_POOL_SIZE: int = 2
+    SMTP_TIMEOUT: int = 30
 
     # Cloudinary
     CLOUDINARY_CLOUD_NAME: str
     CLOUDINARY_API_KEY: str
     CLOUDINARY_API_SECRET: str
+    AVATAR_MAX_SIZE: int = 5 * 1024 * 1024
+    CLOUDINARY_POOL_MAXSIZE: int = 10
 
     # Redis
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_PASSWORD: str | None = None
     REDIS_DB: int = 0
+    REDIS_MAX_CONNECTIONS: int = 100
+    REDIS_POOL_TIMEOUT: int = 5
     REDIS_CACHE_EXPIRE_MINUTES: int = 60
+    USER_CACHE_EXPIRE_SECONDS: int = 60
+
+    # Rate limits: path prefix mapped to (requests, period in seconds);
+    # an empty mapping disables rate limiting
+    RATE_LIMIT_RULES: dict[str, tuple[int, int]] = {"/api/v1/contacts": (10, 60)}
+    # Proxies allowed to set X-Forwarded-For for rate limiting
+    TRUSTED_PROXIES: list[str] = []
 
     model_config = SettingsConfigDict(
         env_file=".env.test" if os.getenv("TESTING") else ".env",
@@ -41,4 +64,10 @@ class Settings(BaseSettings):
     )
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Get the application settings, reading the environment only once."""
+    return Settings()
+
+
+settings = get_settings()
@@ -3,30 +3,94 @@
 This module provides database configuration, session management, and initialization utilities.
 """
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+import logging
+from functools import lru_cache
+
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    create_async_engine,
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+)
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import NullPool
 from app.core.config import settings
 
-# Create async engine
+logger = logging.getLogger(__name__)
+
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
-engine = create_async_engine(
-    SQLALCHEMY_DATABASE_URL,
-    echo=False,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
-)
 
-# Create async session factory
-async_session = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
 
-Base = declarative_base()
+def get_engine(url: str = SQLALCHEMY_DATABASE_URL, pooled: bool = True) -> AsyncEngine:
+    """Get the shared async engine for a database URL.
+    
+    Engines are memoized, so every caller asking for the same URL shares one
+    connection pool however the arguments are passed.
+    
+    Args:
+        url: Async database URL.
+        pooled: Keep a connection pool; pass False for throwaway event loops
+            that connections must not outlive.
+        
+    Returns:
+        AsyncEngine: Engine for the URL.
+    """
+    return _get_engine(str(url), bool(pooled))
+
+
+@lru_cache
+def _get_engine(url: str, pooled: bool) -> AsyncEngine:
+    """Create the engine behind ``get_engine``, keyed on normalized arguments."""
+    if pooled:
+        pool_args = {
+            "pool_pre_ping": True,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            # Fail fast instead of queueing when the pool is exhausted
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+        }
+    else:
+        pool_args = {"poolclass": NullPool}
+    return create_async_engine(
+        url,
+        echo=False,
+        # Reuse prepared statements for the small set of queries this API issues
+        connect_args={
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+        **pool_args,
+    )
+
+
+def create_session_factory(bind, **kwargs) -> async_sessionmaker:
+    """Create a session factory with the application's session settings.
+    
+    Args:
+        bind: Engine or connection the sessions use.
+        **kwargs: Extra ``async_sessionmaker`` options.
+        
+    Returns:
+        async_sessionmaker: Session factory.
+    """
+    return async_sessionmaker(
+        bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+        **kwargs,
+    )
+
+
+engine = get_engine()
+async_session = create_session_factory(engine)
+
+class Base(DeclarativeBase):
+    """Declarative base shared by all models."""
 
 
 async def get_db() -> AsyncSession:
@@ -39,6 +103,14 @@ async def get_db() -> AsyncSession:
         try:
             yield session
             await session.commit()
+        except PoolTimeoutError:
+            logger.warning(
+                "Database pool exhausted (size=%s, overflow=%s)",
+                settings.DB_POOL_SIZE,
+                settings.DB_MAX_OVERFLOW,
+            )
+            await session.rollback()
+            raise
         except Exception:
             await session.rollback()
             raise
@@ -49,8 +121,10 @@ async def get_db() -> AsyncSession:
 async def init_db():
     """Initialize the database.
     
-    Drops and recreates all tables.
+    Creates missing tables for local development. Existing tables and data
+    are left alone; schema changes go through Alembic migrations.
     """
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
+        # Needed by the contact search trigram index
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
@@ -1,9 +1,15 @@
+import asyncio
 import logging
-from email.mime.text import MIMEText
-from typing import Optional
+import time
+from dataclasses import dataclass, field
+from email import policy
+from email.message import EmailMessage
+from typing import List, Optional
 
 import aiosmtplib
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from fastapi import BackgroundTasks
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+from markupsafe import escape
 
 from app.core.config import settings
 
@@ -15,94 +21,244 @@ env = Environment(
     autoescape=select_autoescape(["html", "xml"]),
 )
 
+# Compile the templates once; sends only render them
+VERIFICATION_TEMPLATE = env.get_template("email_verification.html")
+PASSWORD_RESET_TEMPLATE = env.get_template("password_reset.html")
 
-async def send_email(
-    to_email: str,
-    subject: str,
-    body: str,
-) -> bool:
-    """Send an email using SMTP.
+# SMTP settings don't change at runtime
+SMTP_SERVER = settings.SMTP_SERVER
+SMTP_PORT = settings.SMTP_PORT
+SMTP_USERNAME = settings.SMTP_USERNAME
+SMTP_PASSWORD = settings.SMTP_PASSWORD
+SMTP_TIMEOUT = settings.SMTP_TIMEOUT
+
+# Filled in per message in the prebuilt templates below
+TO_PLACEHOLDER = b"__TO__"
+URL_PLACEHOLDER = b"__URL__"
+
+
+def _prebuild_message(template: Template, subject: str, url_field: str) -> bytes:
+    """Serialize a templated email once, leaving placeholders to fill in.
     
     Args:
-        to_email: Recipient email address.
+        template: HTML body template.
         subject: Email subject.
-        body: Email body in HTML format.
+        url_field: Template variable holding the link URL.
+        
+    Returns:
+        bytes: Wire format of the message with recipient and URL placeholders.
+    """
+    message = EmailMessage(policy=policy.SMTP)
+    message["From"] = SMTP_USERNAME
+    message["To"] = TO_PLACEHOLDER.decode()
+    message["Subject"] = subject
+    # 7bit keeps the placeholders intact; the templates are plain ASCII
+    message.set_content(
+        template.render(**{url_field: URL_PLACEHOLDER.decode()}),
+        subtype="html",
+        cte="7bit",
+    )
+    return message.as_bytes()
+
+
+VERIFICATION_MESSAGE = _prebuild_message(
+    VERIFICATION_TEMPLATE, "Email Verification", "verification_url"
+)
+PASSWORD_RESET_MESSAGE = _prebuild_message(
+    PASSWORD_RESET_TEMPLATE, "Password Reset Request", "reset_url"
+)
+
+
+def _fill_message(prebuilt: bytes, to_email: str, url: str) -> bytes:
+    """Fill the recipient and link into a prebuilt message.
+    
+    Args:
+        prebuilt: Message from ``_prebuild_message``.
+        to_email: Recipient email address.
+        url: Link URL for the template.
+        
+    Returns:
+        bytes: Wire format of the message, ready to send.
+    """
+    # Escape the URL the way the template's autoescaping would have
+    return prebuilt.replace(TO_PLACEHOLDER, to_email.encode()).replace(
+        URL_PLACEHOLDER, str(escape(url)).encode()
+    )
+
+
+# Connections are replaced after this many messages
+SMTP_MAX_MESSAGES_PER_CONNECTION = 10_000
+# Idle connections are checked with NOOP before reuse
+SMTP_IDLE_CHECK_SECONDS = 120
+
+
+@dataclass
+class _PooledConnection:
+    smtp: aiosmtplib.SMTP
+    sent: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class SMTPPool:
+    """Pool of logged-in SMTP connections reused across messages.
+    
+    Reusing a connection skips the TCP and TLS handshakes and the AUTH
+    exchange that otherwise precede every message.
+    """
+
+    def __init__(self, size: int):
+        """Initialize an empty pool.
+        
+        Args:
+            size: Maximum number of simultaneously open connections.
+        """
+        self._slots = asyncio.Semaphore(size)
+        self._idle: List[_PooledConnection] = []
+
+    async def _connect(self) -> _PooledConnection:
+        smtp = aiosmtplib.SMTP(
+            hostname=SMTP_SERVER,
+            port=SMTP_PORT,
+            use_tls=True,
+            timeout=SMTP_TIMEOUT,
+        )
+        await smtp.connect()
+        await smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
+        return _PooledConnection(smtp)
+
+    async def _acquire(self) -> _PooledConnection:
+        while self._idle:
+            conn = self._idle.pop()
+            if not conn.smtp.is_connected:
+                continue
+            if time.monotonic() - conn.last_used > SMTP_IDLE_CHECK_SECONDS:
+                # Servers drop idle sessions; find out before sending
+                try:
+                    await conn.smtp.noop()
+                except (aiosmtplib.SMTPException, OSError, asyncio.TimeoutError):
+                    await self._discard(conn)
+                    continue
+            return conn
+        return await self._connect()
+
+    async def _discard(self, conn: _PooledConnection) -> None:
+        try:
+            await conn.smtp.quit()
+        except (aiosmtplib.SMTPException, OSError, asyncio.TimeoutError):
+            conn.smtp.close()
+
+    async def sendmail(self, sender: str, recipients: List[str], message: bytes) -> None:
+        """Send a serialized message over a pooled connection.
+        
+        Args:
+            sender: Envelope sender address.
+            recipients: Envelope recipient addresses.
+            message: Message in wire format.
+            
+        Raises:
+            SMTPException: If the server rejects the message.
+            OSError: If the connection fails.
+        """
+        async with self._slots:
+            conn = await self._acquire()
+            try:
+                try:
+                    await conn.smtp.sendmail(sender, recipients, message)
+                except aiosmtplib.SMTPServerDisconnected:
+                    if not conn.sent:
+                        raise
+                    # The server may close a reused connection at any time
+                    conn.smtp.close()
+                    conn = await self._connect()
+                    await conn.smtp.sendmail(sender, recipients, message)
+            except BaseException:
+                await self._discard(conn)
+                raise
+            conn.sent += 1
+            conn.last_used = time.monotonic()
+            if conn.sent >= SMTP_MAX_MESSAGES_PER_CONNECTION:
+                await self._discard(conn)
+            else:
+                self._idle.append(conn)
+
+    async def close(self) -> None:
+        """Close all idle connections."""
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+
+smtp_pool = SMTPPool(settings.SMTP_POOL_SIZE)
+
+
+async def send_raw_email(to_email: str, message: bytes) -> bool:
+    """Send an already serialized email using SMTP.
+    
+    Args:
+        to_email: Recipient email address.
+        message: Message in wire format.
         
     Returns:
         bool: True if email was sent successfully, False otherwise.
     """
     try:
-        message = MIMEText(body, "html")
-        message["From"] = settings.SMTP_USERNAME
-        message["To"] = to_email
-        message["Subject"] = subject
-
-        async with aiosmtplib.SMTP(
-            hostname=settings.SMTP_SERVER,
-            port=settings.SMTP_PORT,
-            use_tls=True,
-        ) as smtp:
-            await smtp.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-            await smtp.send_message(message)
+        await smtp_pool.sendmail(SMTP_USERNAME, [to_email], message)
             
-        logger.info(f"Email sent successfully to {to_email}")
+        logger.info("Email sent successfully to %s", to_email)
         return True
-    except Exception as e:
-        logger.error(f"Failed to send email to {to_email}: {e}")
+    except (aiosmtplib.SMTPException, OSError, asyncio.TimeoutError):
+        logger.warning("Failed to send email to %s", to_email, exc_info=True)
         return False
 
 
-async def send_verification_email(
+def send_verification_email(
+    background_tasks: BackgroundTasks,
     email: str,
     verification_token: str,
     verification_url: Optional[str] = None,
-) -> bool:
-    """Send email verification email.
+) -> None:
+    """Queue an email verification email.
+    
+    The prebuilt message is filled in right away; the SMTP exchange runs
+    after the response has been sent.
     
     Args:
+        background_tasks: Queue for post-response work.
         email: User's email address.
         verification_token: Email verification token.
         verification_url: Optional custom verification URL.
-        
-    Returns:
-        bool: True if email was sent successfully, False otherwise.
     """
     if not verification_url:
         verification_url = f"http://localhost:8000/api/v1/auth/verify-email/{verification_token}"
 
-    template = env.get_template("email_verification.html")
-    html_content = template.render(verification_url=verification_url)
-
-    return await send_email(
+    background_tasks.add_task(
+        send_raw_email,
         to_email=email,
-        subject="Email Verification",
-        body=html_content,
+        message=_fill_message(VERIFICATION_MESSAGE, email, verification_url),
     )
 
 
-async def send_password_reset_email(
+def send_password_reset_email(
+    background_tasks: BackgroundTasks,
     email: str,
     reset_token: str,
     reset_url: Optional[str] = None,
-) -> bool:
-    """Send password reset email.
+) -> None:
+    """Queue a password reset email.
+    
+    The prebuilt message is filled in right away; the SMTP exchange runs
+    after the response has been sent.
     
     Args:
+        background_tasks: Queue for post-response work.
         email: User's email address.
         reset_token: Password reset token.
         reset_url: Optional custom reset URL.
-        
-    Returns:
-        bool: True if email was sent successfully, False otherwise.
     """
     if not reset_url:
         reset_url = f"http://localhost:8000/reset-password?token={reset_token}"
 
-    template = env.get_template("password_reset.html")
-    html_content = template.render(reset_url=reset_url)
-
-    return await send_email(
+    background_tasks.add_task(
+        send_raw_email,
         to_email=email,
-        subject="Password Reset Request",
-        body=html_content,
+        message=_fill_message(PASSWORD_RESET_MESSAGE, email, reset_url),
     )
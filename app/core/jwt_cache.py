@@ -0,0 +1,69 @@
+"""In-process cache of decoded JWT payloads.
+
+Tokens are signed and immutable, so a payload that validated once stays valid
+until its ``exp`` claim. Caching it skips the signature check and JSON parsing
+for clients that send the same token on every request.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from jose import jwt
+
+from app.core.config import settings
+
+CACHE_MAXSIZE = 10_000
+CACHE_TTL_SECONDS = 60
+
+_cache: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def decode_token(token: str) -> dict:
+    """Decode and validate a JWT, reusing a cached payload when possible.
+
+    Args:
+        token: Encoded JWT.
+
+    Returns:
+        dict: Token payload.
+
+    Raises:
+        JWTError: If the token is invalid or expired.
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(token)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at > now:
+                _cache.move_to_end(token)
+                return payload
+            del _cache[token]
+
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+    # Never keep a payload past the token's own expiry
+    ttl = CACHE_TTL_SECONDS
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        with _lock:
+            _cache[token] = (now + ttl, payload)
+            _cache.move_to_end(token)
+            while len(_cache) > CACHE_MAXSIZE:
+                _cache.popitem(last=False)
+    return payload
+
+
+def invalidate_token(token: str) -> None:
+    """Drop a token from the cache, e.g. on logout."""
+    with _lock:
+        _cache.pop(token, None)
+
+
+def clear() -> None:
+    """Drop all cached payloads."""
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,106 @@
+"""ASGI rate limiting middleware.
+
+Limits are matched on path prefixes before routing, so rejected requests
+never reach FastAPI's dependency resolution or body validation.
+"""
+
+import logging
+import math
+from typing import Dict, Sequence, Tuple
+
+import orjson
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+# Fixed window counter: INCR, start the window on the first hit, and report
+# the remaining window, all in one round trip
+RATE_LIMIT_SCRIPT = """
+local current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[1])
+end
+return {current, redis.call('PTTL', KEYS[1])}
+"""
+
+
+class RateLimitMiddleware:
+    """Reject clients that exceed a request limit on a path prefix.
+
+    Redis errors fail open: requests are let through without rate limiting.
+    """
+
+    def __init__(
+        self,
+        app,
+        redis_client: redis.Redis,
+        rules: Dict[str, Tuple[int, int]],
+        trusted_proxies: Sequence[str] = (),
+    ):
+        """Initialize the middleware.
+
+        Args:
+            app: Wrapped ASGI application.
+            redis_client: Redis client holding the counters.
+            rules: Path prefix mapped to ``(limit, period_seconds)``.
+            trusted_proxies: Proxy addresses whose ``X-Forwarded-For`` header
+                is used to find the client address.
+        """
+        self.app = app
+        self.rules = rules
+        self.trusted_proxies = set(trusted_proxies)
+        self._script = redis_client.register_script(RATE_LIMIT_SCRIPT)
+
+    def _client_ip(self, scope) -> str:
+        client = scope.get("client")
+        ip = client[0] if client else "unknown"
+        if ip not in self.trusted_proxies:
+            return ip
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                # The rightmost untrusted hop is the real client
+                for hop in reversed(value.decode("latin-1").split(",")):
+                    hop = hop.strip()
+                    if hop and hop not in self.trusted_proxies:
+                        return hop
+        return ip
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        for prefix, (limit, period) in self.rules.items():
+            # Match whole path segments: /contacts covers /contacts/1, not /contactsX
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                break
+        else:
+            return await self.app(scope, receive, send)
+
+        key = f"ratelimit:{prefix}:{self._client_ip(scope)}"
+        try:
+            count, ttl_ms = await self._script(keys=[key], args=[period * 1000])
+        except Exception as e:
+            logger.debug(f"Rate limiting skipped for {key}: {e}")
+            return await self.app(scope, receive, send)
+
+        if count <= limit:
+            return await self.app(scope, receive, send)
+
+        retry_after = max(1, math.ceil(ttl_ms / 1000))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": orjson.dumps({"detail": "Too Many Requests"}),
+            }
+        )
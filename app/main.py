@@ -1,20 +1,75 @@
+import asyncio
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 
-import redis.asyncio as redis
-from fastapi import Depends, FastAPI
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_limiter import FastAPILimiter
-from fastapi_limiter.depends import RateLimiter
+from fastapi.responses import ORJSONResponse
 
 from app.api import auth, contacts
+from app.core.body_limit import BodySizeLimitMiddleware
 from app.core.cache import cache
 from app.core.config import settings
-from app.core.database import Base, engine, init_db
+from app.core.database import init_db
+from app.core.email import smtp_pool
+from app.core.rate_limit import RateLimitMiddleware
+
+# Allowance for multipart framing around an uploaded file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+async def init_database() -> None:
+    """Create missing tables in development."""
+    # Outside development the schema is managed by Alembic migrations
+    if settings.ENV == "dev":
+        await init_db()
+        logging.info("Database initialized successfully")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Password hashing runs via asyncio.to_thread, so size the default executor
+    # to let concurrent bcrypt work overlap across cores.
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 2))
+    )
+
+    await init_database()
+
+    yield
+
+    # Say QUIT on pooled SMTP connections instead of dropping them
+    await smtp_pool.close()
+    await cache.close()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
+
+# Rate limit contacts before routing; counters live in the cache's Redis.
+# Added before CORS so CORS stays outermost and 429s carry its headers.
+app.add_middleware(
+    RateLimitMiddleware,
+    redis_client=cache.redis,
+    rules=settings.RATE_LIMIT_RULES,
+    trusted_proxies=settings.TRUSTED_PROXIES,
+)
+
+# Refuse oversized avatars before the multipart body is spooled; the room
+# on top of AVATAR_MAX_SIZE covers the multipart boundaries and part headers
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        f"{settings.API_V1_STR}/auth/avatar": settings.AVATAR_MAX_SIZE
+        + MULTIPART_OVERHEAD
+    },
 )
 
 # Set up CORS middleware
@@ -26,44 +81,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-
-# Initialize rate limiter and database
-@app.on_event("startup")
-async def startup():
-    try:
-        # Initialize Redis rate limiter
-        r = redis.from_url(
-            f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}",
-            password=settings.REDIS_PASSWORD,
-            encoding="utf-8",
-            decode_responses=True,
-        )
-        await FastAPILimiter.init(r)
-        logging.info("Redis rate limiter initialized successfully")
-    except Exception as e:
-        logging.warning(f"Failed to initialize Redis rate limiter: {e}")
-        # If Redis is not available, we'll skip rate limiting
-        app.dependency_overrides[RateLimiter] = lambda: None
-
-    # Initialize database
-    await init_db()
-    logging.info("Database initialized successfully")
-
-
 # Include routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
-
-# Contacts router with optional rate limiting
 app.include_router(
-    contacts.router,
-    prefix=f"{settings.API_V1_STR}/contacts",
-    tags=["contacts"],
-    dependencies=(
-        [Depends(RateLimiter(times=10, seconds=60))]
-        if hasattr(app, "dependency_overrides")
-        and RateLimiter in app.dependency_overrides
-        else []
-    ),
+    contacts.router, prefix=f"{settings.API_V1_STR}/contacts", tags=["contacts"]
 )
 
 
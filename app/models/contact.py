@@ -1,23 +1,80 @@
-from sqlalchemy import Column, Date, ForeignKey, Integer, String, Text, DateTime
-from sqlalchemy.orm import relationship
-from datetime import datetime, UTC
+from sqlalchemy import (
+    Computed,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    SmallInteger,
+    String,
+    Text,
+    func,
+    literal_column,
+)
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Optional
 
 from app.core.database import Base
 
+if TYPE_CHECKING:
+    from app.models.user import User
+
 
 class Contact(Base):
     __tablename__ = "contacts"
+    # Read the server-generated timestamps back with RETURNING on flush
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index("ix_contact_user_email", "user_id", "email", unique=True),
+        Index("ix_contact_user_names", "user_id", "first_name", "last_name"),
+        # Per-user keyset pagination: WHERE user_id = ? AND id > ? ORDER BY id
+        Index("ix_contact_user_id_id", "user_id", "id"),
+        Index("ix_contact_user_birthday_md", "user_id", "birthday_md"),
+        # Trigram index for ILIKE '%term%' search; requires the pg_trgm extension
+        Index(
+            "ix_contact_search_trgm",
+            literal_column(
+                "(coalesce(first_name, '') || ' ' || coalesce(last_name, '')"
+                " || ' ' || coalesce(email, ''))"
+            ).label("search_text"),
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    first_name = Column(String, index=True)
-    last_name = Column(String, index=True)
-    email = Column(String, index=True)
-    phone = Column(String)
-    birthday = Column(Date)
-    additional_data = Column(Text, nullable=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
-    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
-    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+    # Lookups go through the user-leading composite indexes above
+    id: Mapped[int] = mapped_column(primary_key=True)
+    first_name: Mapped[Optional[str]] = mapped_column(String)
+    last_name: Mapped[Optional[str]] = mapped_column(String)
+    email: Mapped[Optional[str]] = mapped_column(String)
+    phone: Mapped[Optional[str]] = mapped_column(String)
+    birthday: Mapped[Optional[date]] = mapped_column(Date)
+    # Birthday as a MMDD integer so upcoming-birthday queries are index range scans
+    birthday_md: Mapped[Optional[int]] = mapped_column(
+        SmallInteger,
+        Computed(
+            "(EXTRACT(MONTH FROM birthday) * 100 + EXTRACT(DAY FROM birthday))::smallint",
+            persisted=True,
+        ),
+    )
+    additional_data: Mapped[Optional[str]] = mapped_column(Text)
+    user_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE")
+    )
+    # Timestamps come from the database clock, not from Python on every write
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    # statement_timestamp() rather than now(): a second write in the same
+    # transaction must still move updated_at, which feeds the list ETags
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.statement_timestamp(),
+    )
 
-    # Define relationship
-    user = relationship("User", back_populates="contacts")
+    # Define relationship. The owner is usually already in the identity map;
+    # anything else must be loaded explicitly (joinedload) instead of lazily.
+    user: Mapped[Optional["User"]] = relationship(
+        back_populates="contacts", lazy="raise_on_sql"
+    )
@@ -1,10 +1,16 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Enum
-from sqlalchemy.orm import relationship
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Optional
+
+from sqlalchemy import Boolean, DateTime, Enum, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 import enum
 
 from app.core.database import Base
 
+if TYPE_CHECKING:
+    from app.models.contact import Contact
+
 
 class UserRole(str, enum.Enum):
     USER = "user"
@@ -14,14 +20,23 @@ class UserRole(str, enum.Enum):
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String(100), unique=True, index=True, nullable=False)
-    hashed_password = Column(String(255), nullable=False)
-    is_active = Column(Boolean, default=True)
-    is_verified = Column(Boolean, default=False)
-    role = Column(Enum(UserRole), default=UserRole.USER)
-    avatar = Column(String(255), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-
-    # Relationship with contacts
-    contacts = relationship("Contact", back_populates="user", cascade="all, delete-orphan")
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    email: Mapped[str] = mapped_column(String(100), unique=True, index=True)
+    hashed_password: Mapped[str] = mapped_column(String(255))
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    is_verified: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    role: Mapped[Optional[UserRole]] = mapped_column(Enum(UserRole), default=UserRole.USER)
+    avatar: Mapped[Optional[str]] = mapped_column(String(255))
+    created_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    # Relationship with contacts. The contacts.user_id foreign key cascades
+    # deletes in the database, so deleting a user never loads its contacts;
+    # other reads must load them explicitly (selectinload).
+    contacts: Mapped[List["Contact"]] = relationship(
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise_on_sql",
+    )
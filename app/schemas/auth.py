@@ -3,12 +3,16 @@ from typing import Optional
 
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 
+from app.schemas.types import Email
+
 
 class UserBase(BaseModel):
-    email: EmailStr
+    email: Email
 
 
 class UserCreate(UserBase):
+    # Full validation where addresses enter the system
+    email: EmailStr
     password: str = Field(..., min_length=8)
     role: str = Field(default="user", pattern="^(user|admin)$")
 
@@ -45,7 +49,7 @@ class TokenPayload(BaseModel):
 
 
 class PasswordResetRequest(BaseModel):
-    email: EmailStr
+    email: Email
 
 
 class PasswordResetResponse(BaseModel):
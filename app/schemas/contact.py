@@ -1,13 +1,15 @@
 from datetime import date, datetime
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict
+
+from app.schemas.types import Email
 
 
 class ContactBase(BaseModel):
     first_name: str
     last_name: str
-    email: EmailStr
+    email: Email
     phone: str
     birthday: date
     additional_data: Optional[str] = None
@@ -20,7 +22,7 @@ class ContactCreate(ContactBase):
 class ContactUpdate(ContactBase):
     first_name: Optional[str] = None
     last_name: Optional[str] = None
-    email: Optional[EmailStr] = None
+    email: Optional[Email] = None
     phone: Optional[str] = None
     birthday: Optional[date] = None
 
@@ -30,5 +32,4 @@ class Contact(ContactBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,25 @@
+"""Shared field types for the API schemas."""
+
+import re
+from typing import Annotated
+
+from pydantic import AfterValidator
+
+EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+
+def _check_email(value: str) -> str:
+    """Check the basic shape of an email address and lowercase its domain.
+
+    The domain is normalised the same way EmailStr does, so lookups by
+    email keep matching rows stored through the signup schema.
+    """
+    if not EMAIL_RE.fullmatch(value):
+        raise ValueError("value is not a valid email address")
+    local, _, domain = value.rpartition("@")
+    return f"{local}@{domain.lower()}"
+
+
+# Cheap syntactic check for hot paths; EmailStr's full email-validator parse
+# is kept for signup only
+Email = Annotated[str, AfterValidator(_check_email)]
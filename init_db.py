@@ -1,5 +1,8 @@
+import asyncio
+
 from app.core.database import init_db
+from app.models import contact, user  # noqa: F401  (register the tables)
 
 if __name__ == "__main__":
-    init_db()
+    asyncio.run(init_db())
     print("Database initialized successfully!")
@@ -0,0 +1,32 @@
+"""add contact birthday index
+
+Revision ID: add_contact_birthday_index
+Revises: add_user_roles
+Create Date: 2026-10-14 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_contact_birthday_index'
+down_revision: Union[str, None] = 'add_user_roles'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Index contacts by owner
+    op.create_index('ix_contacts_user_id', 'contacts', ['user_id'])
+
+    # Expression index matching the upcoming birthdays MMDD predicate
+    op.execute(
+        "CREATE INDEX ix_contacts_birthday_md ON contacts "
+        "(user_id, (EXTRACT(MONTH FROM birthday) * 100 + EXTRACT(DAY FROM birthday)))"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_birthday_md', table_name='contacts')
+    op.drop_index('ix_contacts_user_id', table_name='contacts')
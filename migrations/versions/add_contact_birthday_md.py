@@ -0,0 +1,43 @@
+"""add contact birthday_md generated column
+
+Revision ID: add_contact_birthday_md
+Revises: add_contact_search_trgm
+Create Date: 2026-10-14 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_contact_birthday_md'
+down_revision: Union[str, None] = 'add_contact_search_trgm'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Stored MMDD birthday replaces the expression index
+    op.add_column(
+        'contacts',
+        sa.Column(
+            'birthday_md',
+            sa.SmallInteger(),
+            sa.Computed(
+                "(EXTRACT(MONTH FROM birthday) * 100 + EXTRACT(DAY FROM birthday))::smallint",
+                persisted=True,
+            ),
+        ),
+    )
+    op.create_index('ix_contact_user_birthday_md', 'contacts', ['user_id', 'birthday_md'])
+    op.drop_index('ix_contacts_birthday_md', table_name='contacts')
+
+
+def downgrade() -> None:
+    op.execute(
+        "CREATE INDEX ix_contacts_birthday_md ON contacts "
+        "(user_id, (EXTRACT(MONTH FROM birthday) * 100 + EXTRACT(DAY FROM birthday)))"
+    )
+    op.drop_index('ix_contact_user_birthday_md', table_name='contacts')
+    op.drop_column('contacts', 'birthday_md')
@@ -0,0 +1,29 @@
+"""add contact indexes
+
+Revision ID: add_contact_indexes
+Revises: add_contact_birthday_index
+Create Date: 2026-10-14 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_contact_indexes'
+down_revision: Union[str, None] = 'add_contact_birthday_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # One email per contact list, also used for the duplicate check
+    op.create_index('ix_contact_user_email', 'contacts', ['user_id', 'email'], unique=True)
+
+    # Per-user name lookups
+    op.create_index('ix_contact_user_names', 'contacts', ['user_id', 'first_name', 'last_name'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contact_user_names', table_name='contacts')
+    op.drop_index('ix_contact_user_email', table_name='contacts')
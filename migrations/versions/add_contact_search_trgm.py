@@ -0,0 +1,31 @@
+"""add contact search trigram index
+
+Revision ID: add_contact_search_trgm
+Revises: add_contact_indexes
+Create Date: 2026-10-14 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_contact_search_trgm'
+down_revision: Union[str, None] = 'add_contact_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # GIN trigram index so ILIKE '%term%' searches don't scan every contact.
+    # Uses || rather than concat_ws because index expressions must be IMMUTABLE.
+    op.execute(
+        "CREATE INDEX ix_contact_search_trgm ON contacts USING gin "
+        "((first_name || ' ' || last_name || ' ' || email) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contact_search_trgm', table_name='contacts')
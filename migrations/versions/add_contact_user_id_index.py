@@ -0,0 +1,25 @@
+"""add contact user/id index
+
+Revision ID: add_contact_user_id_index
+Revises: add_contact_birthday_md
+Create Date: 2026-10-14 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_contact_user_id_index'
+down_revision: Union[str, None] = 'add_contact_birthday_md'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Per-user keyset pagination ordered by id
+    op.create_index('ix_contact_user_id_id', 'contacts', ['user_id', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contact_user_id_id', table_name='contacts')
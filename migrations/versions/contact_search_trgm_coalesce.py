@@ -0,0 +1,35 @@
+"""coalesce contact search trigram index columns
+
+Revision ID: contact_search_trgm_coalesce
+Revises: contact_timestamp_server_defaults
+Create Date: 2026-10-14 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'contact_search_trgm_coalesce'
+down_revision: Union[str, None] = 'contact_timestamp_server_defaults'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A NULL column made the whole concatenation NULL, so contacts without
+    # an email could never match a search. Must stay in step with SEARCH_TEXT.
+    op.drop_index('ix_contact_search_trgm', table_name='contacts')
+    op.execute(
+        "CREATE INDEX ix_contact_search_trgm ON contacts USING gin "
+        "((coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' "
+        "|| coalesce(email, '')) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contact_search_trgm', table_name='contacts')
+    op.execute(
+        "CREATE INDEX ix_contact_search_trgm ON contacts USING gin "
+        "((first_name || ' ' || last_name || ' ' || email) gin_trgm_ops)"
+    )
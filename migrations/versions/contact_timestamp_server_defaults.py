@@ -0,0 +1,37 @@
+"""contact timestamp server defaults
+
+Revision ID: contact_timestamp_server_defaults
+Revises: drop_contact_column_indexes
+Create Date: 2026-10-14 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'contact_timestamp_server_defaults'
+down_revision: Union[str, None] = 'drop_contact_column_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("UPDATE contacts SET created_at = now() WHERE created_at IS NULL")
+    op.execute(
+        "UPDATE contacts SET updated_at = created_at WHERE updated_at IS NULL"
+    )
+    op.alter_column(
+        'contacts', 'created_at',
+        server_default=sa.func.now(), nullable=False,
+    )
+    op.alter_column(
+        'contacts', 'updated_at',
+        server_default=sa.func.now(), nullable=False,
+    )
+
+
+def downgrade() -> None:
+    op.alter_column('contacts', 'updated_at', server_default=None, nullable=True)
+    op.alter_column('contacts', 'created_at', server_default=None, nullable=True)
@@ -0,0 +1,34 @@
+"""drop contact single-column indexes
+
+Revision ID: drop_contact_column_indexes
+Revises: add_contact_user_id_index
+Create Date: 2026-10-14 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'drop_contact_column_indexes'
+down_revision: Union[str, None] = 'add_contact_user_id_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Covered by the primary key and the (user_id, ...) composite indexes;
+    # each one only added write cost to every insert and update
+    op.execute("DROP INDEX IF EXISTS ix_contacts_id")
+    op.execute("DROP INDEX IF EXISTS ix_contacts_first_name")
+    op.execute("DROP INDEX IF EXISTS ix_contacts_last_name")
+    op.execute("DROP INDEX IF EXISTS ix_contacts_email")
+    op.execute("DROP INDEX IF EXISTS ix_contacts_user_id")
+
+
+def downgrade() -> None:
+    op.create_index('ix_contacts_user_id', 'contacts', ['user_id'])
+    op.create_index('ix_contacts_email', 'contacts', ['email'])
+    op.create_index('ix_contacts_last_name', 'contacts', ['last_name'])
+    op.create_index('ix_contacts_first_name', 'contacts', ['first_name'])
+    op.create_index('ix_contacts_id', 'contacts', ['id'])
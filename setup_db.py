@@ -1,11 +1,12 @@
 from datetime import date
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, insert, text
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 from app.core.database import Base
 from app.models.contact import Contact
+from app.models.user import User  # noqa: F401  (needed to configure Contact.user)
 
 
 def setup_database():
@@ -29,35 +30,34 @@ def setup_database():
 
     # Add sample data
     sample_contacts = [
-        Contact(
-            first_name="John",
-            last_name="Doe",
-            email="john.doe@example.com",
-            phone="+1234567890",
-            birthday=date(1990, 1, 1),
-            additional_data="Sample contact 1",
-        ),
-        Contact(
-            first_name="Jane",
-            last_name="Smith",
-            email="jane.smith@example.com",
-            phone="+0987654321",
-            birthday=date(1995, 5, 15),
-            additional_data="Sample contact 2",
-        ),
-        Contact(
-            first_name="Bob",
-            last_name="Johnson",
-            email="bob.johnson@example.com",
-            phone="+1122334455",
-            birthday=date(1985, 12, 25),
-            additional_data="Sample contact 3",
-        ),
+        {
+            "first_name": "John",
+            "last_name": "Doe",
+            "email": "john.doe@example.com",
+            "phone": "+1234567890",
+            "birthday": date(1990, 1, 1),
+            "additional_data": "Sample contact 1",
+        },
+        {
+            "first_name": "Jane",
+            "last_name": "Smith",
+            "email": "jane.smith@example.com",
+            "phone": "+0987654321",
+            "birthday": date(1995, 5, 15),
+            "additional_data": "Sample contact 2",
+        },
+        {
+            "first_name": "Bob",
+            "last_name": "Johnson",
+            "email": "bob.johnson@example.com",
+            "phone": "+1122334455",
+            "birthday": date(1985, 12, 25),
+            "additional_data": "Sample contact 3",
+        },
     ]
 
-    # Add contacts to database
-    for contact in sample_contacts:
-        db.add(contact)
+    # One multi-row INSERT instead of a flush per object
+    db.execute(insert(Contact), sample_contacts)
 
     # Commit changes
     db.commit()
@@ -3,42 +3,51 @@
 This module provides test configuration and fixtures for the test suite.
 """
 
+import os
+
+# Hashes only need to round-trip in tests, not resist brute force
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Every test request comes from the same client address
+os.environ.setdefault("RATE_LIMIT_RULES", "{}")
+# Keep test cache entries away from a development cache; flushed per test
+os.environ.setdefault("REDIS_DB", "15")
+
 import pytest
 import pytest_asyncio
 from typing import AsyncGenerator, Generator
 from datetime import datetime, UTC, date
 
 from fastapi.testclient import TestClient
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.orm import Session, raiseload
+from httpx import ASGITransport, AsyncClient
 from fastapi import FastAPI
-from sqlalchemy import select
+from sqlalchemy import event, select, text
 
 from app.main import app
-from app.core.database import Base, get_db
+from app.api import contacts as contacts_api
+from app.core import database
+from app.core.cache import cache
+from app.core.database import Base, create_session_factory, get_engine
 from app.core.config import settings
 from app.models.user import User
 from app.models.contact import Contact
 
 # Create test database engine
 TEST_DATABASE_URL = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
-engine = create_async_engine(
-    TEST_DATABASE_URL,
-    echo=False,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
-)
-
-# Create async session factory
-async_session = sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+# No pooling: each checkout is a fresh connection, so there is no pre-ping
+# round trip and no connection outlives the test that opened it
+engine = get_engine(TEST_DATABASE_URL, pooled=False)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _raise_on_lazy_load(orm_execute_state) -> None:
+    """Make every ORM SELECT in the test run refuse relationship lazy loads.
+
+    An N+1 regression then fails the suite instead of issuing extra queries.
+    """
+    if orm_execute_state.is_select and not orm_execute_state.is_relationship_load:
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*"))
 
 
 @pytest.fixture(scope="session")
@@ -50,11 +59,14 @@ def event_loop() -> Generator:
     loop.close()
 
 
-@pytest.fixture(scope="session", autouse=True)
-async def setup_database() -> None:
+# pytest-asyncio runs in strict mode, so async fixtures need its decorator;
+# under plain @pytest.fixture this coroutine would never be awaited
+@pytest_asyncio.fixture(scope="session", autouse=True)
+async def setup_database() -> AsyncGenerator[None, None]:
     """Set up the test database before running tests."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
     yield
     async with engine.begin() as conn:
@@ -63,26 +75,52 @@ async def setup_database() -> None:
 
 
 @pytest_asyncio.fixture
-async def db() -> AsyncGenerator[AsyncSession, None]:
-    """Get a test database session."""
-    async with async_session() as session:
+async def connection(monkeypatch) -> AsyncGenerator[AsyncConnection, None]:
+    """Open a connection whose transaction is rolled back after the test.
+
+    The application's sessions are bound to the same connection, and every
+    session commit only releases a SAVEPOINT, so nothing a test writes
+    outlives it. The cache is flushed as well, since cached users and
+    contacts would otherwise point at rows that were rolled back.
+    """
+    await cache.clear()
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        test_session = create_session_factory(
+            conn, join_transaction_mode="create_savepoint"
+        )
+        monkeypatch.setattr(database, "async_session", test_session)
+        monkeypatch.setattr(contacts_api, "async_session", test_session)
         try:
-            yield session
-            await session.commit()
-        except Exception:
-            await session.rollback()
-            raise
+            yield conn
         finally:
-            await session.close()
+            await trans.rollback()
+            await cache.clear()
 
 
 @pytest_asyncio.fixture
-async def client() -> AsyncGenerator[AsyncClient, None]:
-    """Create a test client for the FastAPI app."""
-    async with AsyncClient(app=app, base_url="http://test") as client:
+async def db(connection: AsyncConnection) -> AsyncGenerator[AsyncSession, None]:
+    """Get a test database session."""
+    async with database.async_session() as session:
+        yield session
+
+
+@pytest_asyncio.fixture(scope="session")
+async def _client() -> AsyncGenerator[AsyncClient, None]:
+    """Create one test client for the FastAPI app for the whole run."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
         yield client
 
 
+@pytest_asyncio.fixture
+async def client(connection: AsyncConnection, _client: AsyncClient) -> AsyncClient:
+    """Get the shared test client, bound to this test's transaction."""
+    _client.cookies.clear()
+    return _client
+
+
 @pytest_asyncio.fixture
 async def test_user(db: AsyncSession) -> User:
     """Create a test user for authentication."""
@@ -131,16 +169,3 @@ async def test_contact(db: AsyncSession, test_user: User) -> Contact:
     await db.commit()  # Ensure contact is committed to database
     await db.refresh(contact)
     return contact
-
-
-@pytest_asyncio.fixture(autouse=True)
-async def clean_tables(db: AsyncSession):
-    """Clean all tables after each test."""
-    try:
-        yield
-    finally:
-        # Delete all contacts first (due to foreign key constraints)
-        await db.execute(Contact.__table__.delete())
-        # Then delete all users
-        await db.execute(User.__table__.delete())
-        await db.commit() 
\ No newline at end of file
@@ -6,36 +6,26 @@ This module provides functions for setting up and tearing down the test database
 import asyncio
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import Base
+from app.core.database import Base, create_session_factory, get_engine
 from app.core.config import settings
 
 # Create test database engine
 TEST_DATABASE_URL = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
-engine = create_async_engine(
-    TEST_DATABASE_URL,
-    echo=False,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
-)
+# run_async uses a new event loop per call; pooled connections can't cross loops
+engine = get_engine(TEST_DATABASE_URL, pooled=False)
 
 # Create async session factory
-async_session = sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+async_session = create_session_factory(engine)
 
 
 async def init_db() -> None:
     """Initialize the test database by creating all tables."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
 
 
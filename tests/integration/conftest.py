@@ -0,0 +1,43 @@
+"""Shared fixtures for the integration tests."""
+
+import uuid
+from typing import Callable
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from app.core.config import settings
+
+API_PREFIX = settings.API_V1_STR
+REGISTER_URL = f"{API_PREFIX}/auth/register"
+LOGIN_URL = f"{API_PREFIX}/auth/login"
+
+
+@pytest.fixture
+def email_factory() -> Callable[[], str]:
+    """Make addresses that never collide, even across reruns against one database."""
+    return lambda: f"user-{uuid.uuid4().hex}@example.com"
+
+
+@pytest_asyncio.fixture
+async def auth_tokens(client: AsyncClient, email_factory: Callable[[], str]) -> dict:
+    """Register a user through the API and log in once.
+
+    Returns:
+        dict: The user's email and password plus the login response.
+    """
+    user_data = {
+        "email": email_factory(),
+        "password": "testpassword123"
+    }
+    response = await client.post(REGISTER_URL, json=user_data)
+    assert response.status_code == 201
+
+    login_data = {
+        "username": user_data["email"],
+        "password": user_data["password"]
+    }
+    response = await client.post(LOGIN_URL, data=login_data)
+    assert response.status_code == 200
+    return {**user_data, **response.json()}
@@ -1,26 +1,28 @@
 """Integration tests for authentication endpoints."""
 
 import pytest
+from unittest.mock import AsyncMock, patch
 from fastapi import status
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.user import User
-from app.schemas.auth import UserCreate, UserLogin
 from app.core.config import settings
+from tests.integration.conftest import API_PREFIX, LOGIN_URL, REGISTER_URL
 
-API_PREFIX = settings.API_V1_STR
+REFRESH_URL = f"{API_PREFIX}/auth/refresh"
+ME_URL = f"{API_PREFIX}/auth/me"
+LOGOUT_URL = f"{API_PREFIX}/auth/logout"
 
 
 @pytest.mark.asyncio
-async def test_register_user(client: AsyncClient, db: AsyncSession):
+async def test_register_user(client: AsyncClient, db: AsyncSession, email_factory):
     """Test user registration endpoint."""
     user_data = {
-        "email": "test@example.com",
+        "email": email_factory(),
         "password": "testpassword123"
     }
     
-    response = await client.post(f"{API_PREFIX}/auth/register", json=user_data)
+    response = await client.post(REGISTER_URL, json=user_data)
     assert response.status_code == status.HTTP_201_CREATED
     
     data = response.json()
@@ -40,37 +42,21 @@ async def test_register_duplicate_email(client: AsyncClient, db: AsyncSession):
         "email": "duplicate@example.com",
         "password": "testpassword123"
     }
-    await client.post(f"{API_PREFIX}/auth/register", json=user_data)
+    await client.post(REGISTER_URL, json=user_data)
     
     # Second registration with same email
-    response = await client.post(f"{API_PREFIX}/auth/register", json=user_data)
+    response = await client.post(REGISTER_URL, json=user_data)
     assert response.status_code == status.HTTP_409_CONFLICT
     assert response.json()["detail"] == "Email already registered"
 
 
 @pytest.mark.asyncio
-async def test_login_user(client: AsyncClient, db: AsyncSession):
+async def test_login_user(auth_tokens: dict):
     """Test user login endpoint."""
-    # First register a user
-    user_data = {
-        "email": "login@example.com",
-        "password": "testpassword123"
-    }
-    await client.post(f"{API_PREFIX}/auth/register", json=user_data)
-    
-    # Then try to login
-    login_data = {
-        "username": user_data["email"],
-        "password": user_data["password"]
-    }
-    response = await client.post(f"{API_PREFIX}/auth/login", data=login_data)
-    assert response.status_code == status.HTTP_200_OK
-    
-    data = response.json()
-    assert "access_token" in data
-    assert "refresh_token" in data
-    assert "token_type" in data
-    assert data["token_type"] == "bearer"
+    assert "access_token" in auth_tokens
+    assert "refresh_token" in auth_tokens
+    assert "token_type" in auth_tokens
+    assert auth_tokens["token_type"] == "bearer"
 
 
 @pytest.mark.asyncio
@@ -80,32 +66,17 @@ async def test_login_invalid_credentials(client: AsyncClient, db: AsyncSession):
         "username": "nonexistent@example.com",
         "password": "wrongpassword"
     }
-    response = await client.post(f"{API_PREFIX}/auth/login", data=login_data)
+    response = await client.post(LOGIN_URL, data=login_data)
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
     assert response.json()["detail"] == "Incorrect email or password"
 
 
 @pytest.mark.asyncio
-async def test_refresh_token(client: AsyncClient, db: AsyncSession):
+async def test_refresh_token(client: AsyncClient, auth_tokens: dict):
     """Test token refresh endpoint."""
-    # First register and login
-    user_data = {
-        "email": "refresh@example.com",
-        "password": "testpassword123"
-    }
-    await client.post(f"{API_PREFIX}/auth/register", json=user_data)
-    
-    login_data = {
-        "username": user_data["email"],
-        "password": user_data["password"]
-    }
-    login_response = await client.post(f"{API_PREFIX}/auth/login", data=login_data)
-    refresh_token = login_response.json()["refresh_token"]
-    
-    # Then try to refresh
     response = await client.post(
-        f"{API_PREFIX}/auth/refresh",
-        headers={"Authorization": f"Bearer {refresh_token}"}
+        REFRESH_URL,
+        headers={"Authorization": f"Bearer {auth_tokens['refresh_token']}"}
     )
     assert response.status_code == status.HTTP_200_OK
     
@@ -117,32 +88,114 @@ async def test_refresh_token(client: AsyncClient, db: AsyncSession):
 
 
 @pytest.mark.asyncio
-async def test_get_current_user(client: AsyncClient, db: AsyncSession):
+async def test_refresh_rejects_access_token(client: AsyncClient, auth_tokens: dict):
+    """Test an access token can't be used to mint new tokens."""
+    response = await client.post(
+        REFRESH_URL,
+        headers={"Authorization": f"Bearer {auth_tokens['access_token']}"}
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_refresh_after_logout(client: AsyncClient, auth_tokens: dict):
+    """Test a refresh token stops working once it is logged out."""
+    headers = {"Authorization": f"Bearer {auth_tokens['refresh_token']}"}
+    response = await client.post(LOGOUT_URL, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await client.post(REFRESH_URL, headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Refresh token has been revoked"
+
+
+@pytest.mark.asyncio
+async def test_refresh_fails_closed_without_redis(client: AsyncClient, auth_tokens: dict):
+    """Test refreshing is refused when revocations can't be checked."""
+    with patch(
+        "app.api.auth.cache.redis.exists",
+        AsyncMock(side_effect=ConnectionError("Redis is down")),
+    ):
+        response = await client.post(
+            REFRESH_URL,
+            headers={"Authorization": f"Bearer {auth_tokens['refresh_token']}"}
+        )
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+@pytest.mark.asyncio
+async def test_logout_rejects_access_token(client: AsyncClient, auth_tokens: dict):
+    """Test only refresh tokens can be logged out."""
+    response = await client.post(
+        LOGOUT_URL,
+        headers={"Authorization": f"Bearer {auth_tokens['access_token']}"}
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_logout_fails_closed_without_redis(client: AsyncClient, auth_tokens: dict):
+    """Test logout reports failure when the revocation can't be stored."""
+    with patch(
+        "app.api.auth.cache.redis.set",
+        AsyncMock(side_effect=ConnectionError("Redis is down")),
+    ):
+        response = await client.post(
+            LOGOUT_URL,
+            headers={"Authorization": f"Bearer {auth_tokens['refresh_token']}"}
+        )
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+@pytest.mark.asyncio
+async def test_get_current_user(client: AsyncClient, auth_tokens: dict):
     """Test getting current user information."""
-    # First register and login
-    user_data = {
-        "email": "current@example.com",
-        "password": "testpassword123"
-    }
-    await client.post(f"{API_PREFIX}/auth/register", json=user_data)
-    
-    login_data = {
-        "username": user_data["email"],
-        "password": user_data["password"]
-    }
-    login_response = await client.post(f"{API_PREFIX}/auth/login", data=login_data)
-    access_token = login_response.json()["access_token"]
-    
-    # Then get current user
     response = await client.get(
-        f"{API_PREFIX}/auth/me",
-        headers={"Authorization": f"Bearer {access_token}"}
+        ME_URL,
+        headers={"Authorization": f"Bearer {auth_tokens['access_token']}"}
     )
     assert response.status_code == status.HTTP_200_OK
     
     data = response.json()
-    assert data["email"] == user_data["email"]
+    assert data["email"] == auth_tokens["email"]
     assert "id" in data
     assert "is_active" in data
     assert "is_verified" in data
-    assert "password" not in data 
\ No newline at end of file
+    assert "password" not in data 
+
+@pytest.mark.asyncio
+async def test_request_password_reset_mixed_case_domain(client: AsyncClient, db: AsyncSession):
+    """Test a reset request finds the user whatever the domain's case."""
+    await client.post(
+        REGISTER_URL, json={"email": "reset@example.com", "password": "testpassword123"}
+    )
+    with patch("app.api.auth.send_password_reset_email") as send:
+        response = await client.post(
+            f"{API_PREFIX}/auth/request-password-reset",
+            json={"email": "reset@EXAMPLE.com"},
+        )
+    assert response.status_code == status.HTTP_200_OK
+    assert send.call_args.kwargs["email"] == "reset@example.com"
+
+
+@pytest.mark.asyncio
+async def test_oversized_avatar_rejected_before_parsing(client: AsyncClient, db: AsyncSession):
+    """Test avatar bodies over the limit are refused before the upload is spooled."""
+    body = b"x" * (settings.AVATAR_MAX_SIZE + 1024 * 1024)
+    response = await client.post(
+        f"{API_PREFIX}/auth/avatar", files={"file": ("a.png", body, "image/png")}
+    )
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    async def stream():
+        # No Content-Length: the size is only known while reading
+        yield b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.png\"\r\n\r\n"
+        for _ in range(7):
+            yield b"x" * (1024 * 1024)
+
+    response = await client.post(
+        f"{API_PREFIX}/auth/avatar",
+        content=stream(),
+        headers={"Content-Type": "multipart/form-data; boundary=b"},
+    )
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
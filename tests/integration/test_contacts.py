@@ -4,17 +4,25 @@ import pytest
 from datetime import date, timedelta
 from fastapi import status
 from httpx import AsyncClient
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.contacts import SEARCH_TEXT, _bump_contacts_version, _contacts_version
+from app.core.cache import cache
 from app.models.contact import Contact
+from app.schemas.contact import Contact as ContactSchema
 from app.core.config import settings
 
 API_PREFIX = settings.API_V1_STR
+CONTACTS_URL = f"{API_PREFIX}/contacts/"
+EXPORT_URL = f"{API_PREFIX}/contacts/export"
+BIRTHDAYS_URL = f"{API_PREFIX}/contacts/birthdays/upcoming"
 
 
 @pytest.mark.asyncio
-async def test_create_contact(client: AsyncClient, db: AsyncSession, auth_token: str):
-    """Test creating a new contact."""
+async def test_contact_crud_flow(client: AsyncClient, db: AsyncSession, auth_token: str):
+    """Test creating, reading, updating and deleting one contact in turn."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
     contact_data = {
         "first_name": "John",
         "last_name": "Doe",
@@ -24,98 +32,68 @@ async def test_create_contact(client: AsyncClient, db: AsyncSession, auth_token:
         "additional_data": "Test contact"
     }
     
+    # Create
     response = await client.post(
-        f"{API_PREFIX}/contacts/",
-        json=contact_data,
-        headers={"Authorization": f"Bearer {auth_token}"}
+        CONTACTS_URL, json=contact_data, headers=headers
     )
     assert response.status_code == status.HTTP_201_CREATED
     
     data = response.json()
-    assert data["first_name"] == contact_data["first_name"]
-    assert data["last_name"] == contact_data["last_name"]
-    assert data["email"] == contact_data["email"]
-    assert data["phone"] == contact_data["phone"]
-    assert data["birthday"] == contact_data["birthday"]
-    assert data["additional_data"] == contact_data["additional_data"]
+    for field, value in contact_data.items():
+        assert data[field] == value
     assert "id" in data
     assert "created_at" in data
     assert "updated_at" in data
-
-
-@pytest.mark.asyncio
-async def test_get_contacts(client: AsyncClient, db: AsyncSession, auth_token: str):
-    """Test getting all contacts."""
-    response = await client.get(
-        f"{API_PREFIX}/contacts/",
-        headers={"Authorization": f"Bearer {auth_token}"}
-    )
-    assert response.status_code == status.HTTP_200_OK
+    contact_url = f"{CONTACTS_URL}{data['id']}"
     
-    data = response.json()
-    assert isinstance(data, list)
-
-
-@pytest.mark.asyncio
-async def test_get_contact(client: AsyncClient, db: AsyncSession, auth_token: str, test_contact: Contact):
-    """Test getting a specific contact."""
-    response = await client.get(
-        f"{API_PREFIX}/contacts/{test_contact.id}",
-        headers={"Authorization": f"Bearer {auth_token}"}
-    )
+    # Read
+    response = await client.get(contact_url, headers=headers)
     assert response.status_code == status.HTTP_200_OK
+    assert response.json() == data
     
-    data = response.json()
-    assert data["id"] == test_contact.id
-    assert data["first_name"] == test_contact.first_name
-    assert data["last_name"] == test_contact.last_name
-    assert data["email"] == test_contact.email
-
-
-@pytest.mark.asyncio
-async def test_update_contact(client: AsyncClient, db: AsyncSession, auth_token: str, test_contact: Contact):
-    """Test updating a contact."""
+    # Update
     update_data = {
         "first_name": "Updated",
         "last_name": "Name",
         "email": "updated@example.com"
     }
-    
-    response = await client.put(
-        f"{API_PREFIX}/contacts/{test_contact.id}",
-        json=update_data,
-        headers={"Authorization": f"Bearer {auth_token}"}
-    )
+    response = await client.put(contact_url, json=update_data, headers=headers)
     assert response.status_code == status.HTTP_200_OK
     
     data = response.json()
     assert data["first_name"] == update_data["first_name"]
     assert data["last_name"] == update_data["last_name"]
     assert data["email"] == update_data["email"]
+    assert data["phone"] == contact_data["phone"]
+    
+    # Delete
+    response = await client.delete(contact_url, headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert response.content == b""
+    
+    # Verify contact is deleted
+    get_response = await client.get(contact_url, headers=headers)
+    assert get_response.status_code == status.HTTP_404_NOT_FOUND
 
 
 @pytest.mark.asyncio
-async def test_delete_contact(client: AsyncClient, db: AsyncSession, auth_token: str, test_contact: Contact):
-    """Test deleting a contact."""
-    response = await client.delete(
-        f"{API_PREFIX}/contacts/{test_contact.id}",
+async def test_get_contacts(client: AsyncClient, db: AsyncSession, auth_token: str):
+    """Test getting all contacts."""
+    response = await client.get(
+        CONTACTS_URL,
         headers={"Authorization": f"Bearer {auth_token}"}
     )
     assert response.status_code == status.HTTP_200_OK
     
-    # Verify contact is deleted
-    get_response = await client.get(
-        f"{API_PREFIX}/contacts/{test_contact.id}",
-        headers={"Authorization": f"Bearer {auth_token}"}
-    )
-    assert get_response.status_code == status.HTTP_404_NOT_FOUND
+    data = response.json()
+    assert isinstance(data, list)
 
 
 @pytest.mark.asyncio
 async def test_search_contacts(client: AsyncClient, db: AsyncSession, auth_token: str, test_contact: Contact):
     """Test searching contacts."""
     response = await client.get(
-        f"{API_PREFIX}/contacts/?search={test_contact.first_name}",
+        f"{CONTACTS_URL}?search={test_contact.first_name}",
         headers={"Authorization": f"Bearer {auth_token}"}
     )
     assert response.status_code == status.HTTP_200_OK
@@ -126,6 +104,17 @@ async def test_search_contacts(client: AsyncClient, db: AsyncSession, auth_token
     assert any(contact["id"] == test_contact.id for contact in data)
 
 
+@pytest.mark.asyncio
+async def test_search_text_with_null_column(db: AsyncSession, test_user):
+    """Test a NULL column doesn't stop the other columns from matching."""
+    contact = Contact(first_name="Nomail", last_name="Person", user_id=test_user.id)
+    db.add(contact)
+    await db.commit()
+
+    result = await db.execute(select(Contact.id).where(SEARCH_TEXT.ilike("%Nomail%")))
+    assert result.scalars().all() == [contact.id]
+
+
 @pytest.mark.asyncio
 async def test_get_upcoming_birthdays(client: AsyncClient, db: AsyncSession, auth_token: str):
     """Test getting contacts with upcoming birthdays."""
@@ -140,14 +129,14 @@ async def test_get_upcoming_birthdays(client: AsyncClient, db: AsyncSession, aut
     }
     
     create_response = await client.post(
-        f"{API_PREFIX}/contacts/",
+        CONTACTS_URL,
         json=contact_data,
         headers={"Authorization": f"Bearer {auth_token}"}
     )
     assert create_response.status_code == status.HTTP_201_CREATED
     
     response = await client.get(
-        f"{API_PREFIX}/contacts/birthdays/upcoming",
+        BIRTHDAYS_URL,
         headers={"Authorization": f"Bearer {auth_token}"}
     )
     assert response.status_code == status.HTTP_200_OK
@@ -155,4 +144,246 @@ async def test_get_upcoming_birthdays(client: AsyncClient, db: AsyncSession, aut
     data = response.json()
     assert isinstance(data, list)
     assert len(data) > 0
-    assert any(contact["email"] == contact_data["email"] for contact in data) 
\ No newline at end of file
+    assert any(contact["email"] == contact_data["email"] for contact in data) 
+
+@pytest.mark.asyncio
+async def test_upcoming_birthdays_follow_writes(client: AsyncClient, db: AsyncSession, auth_token: str):
+    """Test creating and deleting a contact updates cached upcoming birthdays."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = await client.get(BIRTHDAYS_URL, headers=headers)
+    assert response.json() == []
+
+    contact_data = {
+        "first_name": "Birthday",
+        "last_name": "Person",
+        "email": "soon@example.com",
+        "phone": "+1234567890",
+        "birthday": (date.today() + timedelta(days=2)).isoformat(),
+    }
+    created = await client.post(CONTACTS_URL, json=contact_data, headers=headers)
+    response = await client.get(BIRTHDAYS_URL, headers=headers)
+    assert [contact["email"] for contact in response.json()] == [contact_data["email"]]
+
+    await client.delete(f"{CONTACTS_URL}{created.json()['id']}", headers=headers)
+    response = await client.get(BIRTHDAYS_URL, headers=headers)
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_get_contacts_cursor(client: AsyncClient, db: AsyncSession, auth_token: str, test_contact: Contact):
+    """Test keyset pagination of contacts."""
+    response = await client.get(
+        f"{CONTACTS_URL}?limit=1",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["X-Next-Cursor"] == str(test_contact.id)
+
+    response = await client.get(
+        f"{CONTACTS_URL}?limit=1&cursor={test_contact.id}",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == []
+    assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_create_contact_duplicate_email(client: AsyncClient, db: AsyncSession, auth_token: str, test_contact: Contact):
+    """Test creating a contact with an email already in the user's contacts."""
+    contact_data = {
+        "first_name": "Other",
+        "last_name": "Person",
+        "email": test_contact.email,
+        "phone": "+1234567890",
+        "birthday": "1990-01-01",
+    }
+
+    response = await client.post(
+        CONTACTS_URL,
+        json=contact_data,
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Contact with this email already exists"
+
+
+@pytest.mark.asyncio
+async def test_update_contact_duplicate_email(client: AsyncClient, db: AsyncSession, auth_token: str, test_contact: Contact):
+    """Test moving a contact onto an email already in the user's contacts."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    contact_data = {
+        "first_name": "Other",
+        "last_name": "Person",
+        "email": "other.person@example.com",
+        "phone": "+1234567890",
+        "birthday": "1990-01-01",
+    }
+    response = await client.post(CONTACTS_URL, json=contact_data, headers=headers)
+    other_id = response.json()["id"]
+
+    response = await client.put(
+        f"{CONTACTS_URL}{other_id}",
+        json={"email": test_contact.email},
+        headers=headers
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Contact with this email already exists"
+
+
+@pytest.mark.asyncio
+async def test_empty_update_keeps_list_etag(client: AsyncClient, db: AsyncSession, auth_token: str, test_contact: Contact):
+    """Test a PUT that changes nothing doesn't invalidate cached lists."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    etag = (await client.get(CONTACTS_URL, headers=headers)).headers["ETag"]
+
+    response = await client.put(f"{CONTACTS_URL}{test_contact.id}", json={}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["id"] == test_contact.id
+
+    response = await client.get(CONTACTS_URL, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.asyncio
+async def test_update_delete_missing_contact(client: AsyncClient, db: AsyncSession, auth_token: str):
+    """Test that updating or deleting a missing contact returns 404."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.put(
+        f"{CONTACTS_URL}999999",
+        json={"first_name": "Nobody"},
+        headers=headers
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = await client.delete(f"{CONTACTS_URL}999999", headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_export_contacts_matches_schema(client: AsyncClient, db: AsyncSession, auth_token: str, test_contact: Contact):
+    """Test the SQL-built export returns the same contacts as the list endpoint."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    exported = await client.get(EXPORT_URL, headers=headers)
+    assert exported.status_code == status.HTTP_200_OK
+    assert exported.headers["content-type"] == "application/json"
+
+    listed = await client.get(CONTACTS_URL, headers=headers)
+    exported_contacts = [ContactSchema.model_validate(item) for item in exported.json()]
+    listed_contacts = [ContactSchema.model_validate(item) for item in listed.json()]
+    assert exported_contacts == listed_contacts
+
+
+@pytest.mark.asyncio
+async def test_export_contacts_empty(client: AsyncClient, db: AsyncSession, auth_token: str):
+    """Test exporting a user without contacts returns an empty array."""
+    response = await client.get(
+        EXPORT_URL,
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_get_contact_of_another_user(client: AsyncClient, db: AsyncSession, test_contact: Contact):
+    """Test that a contact owned by another user is not found."""
+    from app.core.auth import create_access_token
+    from app.models.user import User
+
+    other_user = User(email="other@example.com", hashed_password="x", is_active=True, is_verified=True)
+    db.add(other_user)
+    await db.commit()
+    token = create_access_token(data={"sub": other_user.email})
+
+    response = await client.get(
+        f"{CONTACTS_URL}{test_contact.id}",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_get_contacts_not_modified(client: AsyncClient, db: AsyncSession, auth_token: str, test_contact: Contact):
+    """Test ETag revalidation of the contact list."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = await client.get(CONTACTS_URL, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["ETag"]
+
+    response = await client.get(
+        CONTACTS_URL, headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+
+    # Any write produces a new ETag
+    await client.put(
+        f"{CONTACTS_URL}{test_contact.id}",
+        json={"first_name": "Changed"},
+        headers=headers
+    )
+    response = await client.get(
+        CONTACTS_URL, headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_contacts_version_counter(db: AsyncSession, test_user):
+    """Test writes bump the version and a lost counter never restarts low."""
+    first = await _contacts_version(db, test_user.id)
+    assert await _contacts_version(db, test_user.id) == first
+
+    await _bump_contacts_version(test_user.id)
+    assert int(await _contacts_version(db, test_user.id)) == int(first) + 1
+
+    await cache.delete(f"contacts_version:{test_user.id}")
+    await _bump_contacts_version(test_user.id)
+    assert int(await _contacts_version(db, test_user.id)) > int(first) + 1
+
+
+@pytest.mark.asyncio
+async def test_get_contact_not_modified(client: AsyncClient, db: AsyncSession, auth_token: str, test_contact: Contact):
+    """Test ETag revalidation of a single contact."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = await client.get(f"{CONTACTS_URL}{test_contact.id}", headers=headers)
+    etag = response.headers["ETag"]
+
+    response = await client.get(
+        f"{CONTACTS_URL}{test_contact.id}",
+        headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.asyncio
+async def test_lazy_relationship_load_raises(db: AsyncSession, test_contact: Contact):
+    """Test the suite-wide raiseload guard rejects implicit relationship loads."""
+    from sqlalchemy import select
+    from sqlalchemy.exc import InvalidRequestError
+
+    result = await db.execute(
+        select(Contact)
+        .where(Contact.id == test_contact.id)
+        .execution_options(populate_existing=True)
+    )
+    contact = result.scalar_one()
+    with pytest.raises(InvalidRequestError):
+        contact.user
+
+
+@pytest.mark.asyncio
+async def test_deleting_user_cascades_in_database(db: AsyncSession, test_user, test_contact: Contact):
+    """Test deleting a user removes its contacts without loading them."""
+    from sqlalchemy import func, select
+
+    contact_id = test_contact.id
+    db.expunge(test_contact)
+    await db.delete(test_user)
+    await db.commit()
+
+    result = await db.execute(select(func.count()).where(Contact.id == contact_id))
+    assert result.scalar_one() == 0
@@ -0,0 +1,44 @@
+"""Shared fixtures for the unit tests."""
+
+from datetime import datetime, UTC
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth import get_password_hash
+from app.models.user import User
+
+
+@pytest.fixture(scope="session")
+def bcrypt_sample() -> tuple[str, str]:
+    """Hash one password for the whole run; bcrypt is deliberately slow."""
+    password = "password123"
+    return password, get_password_hash(password)
+
+
+@pytest.fixture
+def mock_user() -> User:
+    """Create a mock user for testing."""
+    return User(
+        id=1,
+        email="test@example.com",
+        hashed_password="hashed_password",
+        is_active=True,
+        is_verified=True,
+        created_at=datetime.now(UTC)
+    )
+
+
+@pytest.fixture(scope="module")
+def _mock_db_session() -> AsyncSession:
+    """Build the mock session once per module; spec introspection is slow."""
+    return AsyncMock(spec=AsyncSession)
+
+
+@pytest.fixture
+def mock_db(_mock_db_session: AsyncSession) -> AsyncSession:
+    """Get a mock database session with no recorded calls or leftover stubs."""
+    _mock_db_session.reset_mock(return_value=True, side_effect=True)
+    _mock_db_session.execute.return_value = MagicMock(scalar_one_or_none=lambda: None)
+    return _mock_db_session
@@ -5,86 +5,65 @@ This module contains unit tests for authentication-related utilities and functio
 
 import pytest
 from datetime import datetime, timedelta, UTC
-from unittest.mock import MagicMock, patch, AsyncMock
+from unittest.mock import patch, AsyncMock
 from fastapi import HTTPException
 from jose import jwt
 from passlib.context import CryptContext
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from app.core.auth import (
     verify_password,
-    get_password_hash,
     create_access_token,
     create_refresh_token,
     get_current_user,
     get_current_active_user,
 )
-from app.models.user import User
 from app.core.config import settings
 
-@pytest.fixture
-def mock_user() -> User:
-    """Create a mock user for testing."""
-    return User(
-        id=1,
-        email="test@example.com",
-        hashed_password="hashed_password",
-        is_active=True,
-        is_verified=True,
-        created_at=datetime.now(UTC)
-    )
-
-@pytest.fixture
-def mock_db() -> AsyncSession:
-    """Create a mock database session."""
-    mock = AsyncMock(spec=AsyncSession)
-    mock.execute.return_value = MagicMock(scalar_one_or_none=lambda: None)
-    return mock
+@pytest.fixture(scope="module")
+def access_token() -> str:
+    """Mint one access token for the tests that only read it."""
+    return create_access_token(data={"sub": "test@example.com"})
 
-@pytest.mark.asyncio
-async def test_verify_password():
+def test_verify_password(bcrypt_sample):
     """Test password verification."""
-    plain_password = "password123"
-    hashed_password = get_password_hash(plain_password)
+    plain_password, hashed_password = bcrypt_sample
     assert verify_password(plain_password, hashed_password)
     assert not verify_password("wrongpassword", hashed_password)
 
-def test_get_password_hash():
+def test_get_password_hash(bcrypt_sample):
     """Test password hashing functionality."""
-    password = "test_password"
-    hashed_password = get_password_hash(password)
+    password, hashed_password = bcrypt_sample
     assert hashed_password != password
     assert len(hashed_password) > 0
 
-@pytest.mark.asyncio
-async def test_create_access_token():
-    """Test access token creation."""
+@pytest.mark.parametrize("make_token,expires_delta", [
+    (create_access_token, timedelta(minutes=15)),
+    (create_refresh_token, timedelta(days=7)),
+])
+def test_token_roundtrip(make_token, expires_delta):
+    """Test access and refresh tokens decode to the given subject."""
     data = {"sub": "test@example.com"}
-    expires_delta = timedelta(minutes=15)
-    token = create_access_token(data=data, expires_delta=expires_delta)
+    token = make_token(data, expires_delta)
     
-    # Verify token
     payload = jwt.decode(
         token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
     )
     assert payload["sub"] == data["sub"]
     assert "exp" in payload
 
-def test_create_refresh_token():
-    """Test refresh token creation."""
+def test_refresh_token_ids_are_unique():
+    """Test every refresh token gets its own jti and is marked as a refresh token."""
     data = {"sub": "test@example.com"}
-    expires_delta = timedelta(days=7)
-    token = create_refresh_token(data, expires_delta)
-    
-    decoded = jwt.decode(
-        token,
-        settings.SECRET_KEY,
-        algorithms=[settings.ALGORITHM]
+    first, second = (
+        jwt.decode(
+            create_refresh_token(data),
+            settings.SECRET_KEY,
+            algorithms=[settings.ALGORITHM],
+        )
+        for _ in range(2)
     )
-    
-    assert decoded["sub"] == data["sub"]
-    assert "exp" in decoded
+    assert first["jti"] != second["jti"]
+    assert first["type"] == "refresh"
 
 @pytest.mark.asyncio
 async def test_get_current_user_invalid_token(mock_db):
@@ -96,31 +75,67 @@ async def test_get_current_user_invalid_token(mock_db):
     assert "Could not validate credentials" in str(exc_info.value.detail)
 
 @pytest.mark.asyncio
-async def test_get_current_active_user():
+async def test_get_current_active_user(mock_user):
     """Test getting current active user."""
-    mock_user = User(
-        email="test@example.com",
-        hashed_password="hashed",
-        is_active=True,
-        is_verified=True,
-        created_at=datetime.now(UTC)
-    )
-    
     user = await get_current_active_user(mock_user)
     assert user == mock_user
 
 @pytest.mark.asyncio
-async def test_get_current_active_user_inactive():
+async def test_get_current_active_user_inactive(mock_user):
     """Test getting current inactive user."""
-    mock_user = User(
-        email="test@example.com",
-        hashed_password="hashed",
-        is_active=False,
-        is_verified=True,
-        created_at=datetime.now(UTC)
-    )
+    mock_user.is_active = False
     
     with pytest.raises(HTTPException) as exc_info:
         await get_current_active_user(mock_user)
     assert exc_info.value.status_code == 400
-    assert exc_info.value.detail == "Inactive user" 
\ No newline at end of file
+    assert exc_info.value.detail == "Inactive user" 
+
+@pytest.mark.asyncio
+async def test_get_current_user_from_cache(mock_db, access_token):
+    """Test that a cached user is returned without querying the database."""
+    cached = {
+        "id": 1,
+        "email": "test@example.com",
+        "is_active": True,
+        "is_verified": True,
+        "role": "user",
+        "avatar": None,
+        "created_at": datetime.now(UTC).isoformat(),
+    }
+    with patch("app.core.auth.cache") as mock_cache:
+        mock_cache.get_or_set = AsyncMock(return_value=cached)
+        user = await get_current_user(access_token, mock_db)
+
+    assert user.id == 1
+    assert user.email == "test@example.com"
+    mock_db.execute.assert_not_called()
+
+
+def test_decode_token_cached(access_token):
+    """Test that a decoded token payload is served from the cache."""
+    from app.core import jwt_cache
+
+    payload = jwt_cache.decode_token(access_token)
+    assert payload["sub"] == "test@example.com"
+
+    with patch("app.core.jwt_cache.jwt.decode") as mock_decode:
+        assert jwt_cache.decode_token(access_token) == payload
+        mock_decode.assert_not_called()
+
+    jwt_cache.invalidate_token(access_token)
+    with patch("app.core.jwt_cache.jwt.decode", return_value=payload) as mock_decode:
+        jwt_cache.decode_token(access_token)
+        mock_decode.assert_called_once()
+
+
+def test_legacy_bcrypt_hash_needs_rehash(bcrypt_sample):
+    """Test that plain bcrypt hashes verify and are flagged for upgrade."""
+    from app.core.auth import password_needs_rehash
+
+    password, current_hash = bcrypt_sample
+    legacy_hash = CryptContext(
+        schemes=["bcrypt"], bcrypt__rounds=settings.BCRYPT_ROUNDS
+    ).hash(password)
+    assert verify_password(password, legacy_hash)
+    assert password_needs_rehash(legacy_hash)
+    assert not password_needs_rehash(current_hash)
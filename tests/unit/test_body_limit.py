@@ -0,0 +1,63 @@
+import pytest
+from unittest.mock import AsyncMock
+from starlette.exceptions import HTTPException
+
+from app.core.body_limit import BodySizeLimitMiddleware
+
+def _scope(path, headers=()):
+    return {"type": "http", "path": path, "headers": list(headers)}
+
+def _receive(*chunks):
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+    return AsyncMock(side_effect=messages)
+
+@pytest.mark.asyncio
+async def test_content_length_over_limit_is_rejected():
+    """Test a declared oversized body gets 413 without reaching the application."""
+    app = AsyncMock()
+    middleware = BodySizeLimitMiddleware(app, limits={"/api/v1/auth/avatar": 10})
+    send = AsyncMock()
+    await middleware(_scope("/api/v1/auth/avatar", [(b"content-length", b"11")]), AsyncMock(), send)
+
+    app.assert_not_awaited()
+    assert send.await_args_list[0].args[0]["status"] == 413
+
+@pytest.mark.asyncio
+async def test_streamed_body_over_limit_is_rejected():
+    """Test a body without a truthful Content-Length is cut off while reading."""
+    async def app(scope, receive, send):
+        assert (await receive())["body"] == b"12345"
+        await receive()
+
+    middleware = BodySizeLimitMiddleware(app, limits={"/api/v1/auth/avatar": 8})
+    with pytest.raises(HTTPException) as exc_info:
+        await middleware(_scope("/api/v1/auth/avatar"), _receive(b"12345", b"6789"), AsyncMock())
+    assert exc_info.value.status_code == 413
+
+@pytest.mark.asyncio
+async def test_body_within_limit_passes_through():
+    """Test bodies within the limit reach the application intact."""
+    chunks = []
+
+    async def app(scope, receive, send):
+        chunks.append((await receive())["body"])
+
+    middleware = BodySizeLimitMiddleware(app, limits={"/api/v1/auth/avatar": 8})
+    await middleware(
+        _scope("/api/v1/auth/avatar", [(b"content-length", b"5")]), _receive(b"12345"), AsyncMock()
+    )
+    assert chunks == [b"12345"]
+
+@pytest.mark.asyncio
+async def test_unmatched_path_is_not_limited():
+    """Test paths without a limit get the original receive channel."""
+    app = AsyncMock()
+    receive = AsyncMock()
+    middleware = BodySizeLimitMiddleware(app, limits={"/api/v1/auth/avatar": 10})
+    scope = _scope("/api/v1/contacts/", [(b"content-length", b"1000")])
+    await middleware(scope, receive, AsyncMock())
+
+    app.assert_awaited_once_with(scope, receive, app.await_args.args[2])
@@ -0,0 +1,75 @@
+import pytest
+import orjson
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.core.cache import RedisCache
+
+@pytest.fixture
+def redis_cache():
+    with patch("app.core.cache.redis.BlockingConnectionPool"), patch(
+        "app.core.cache.redis.Redis", return_value=MagicMock()
+    ):
+        yield RedisCache()
+
+@pytest.mark.asyncio
+async def test_mget(redis_cache):
+    """Test that mget decodes hits and returns None for misses."""
+    redis_cache.redis.mget = AsyncMock(return_value=[orjson.dumps({"id": 1}), None])
+
+    assert await redis_cache.mget(["a", "b"]) == [{"id": 1}, None]
+    redis_cache.redis.mget.assert_awaited_once_with(["a", "b"])
+
+@pytest.mark.asyncio
+async def test_mset_uses_single_pipeline(redis_cache):
+    """Test that mset queues every key on one pipeline."""
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    redis_cache.redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    redis_cache.redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    assert await redis_cache.mset({"a": 1, "b": 2}, expire=10)
+    pipe.set.assert_any_call("a", b"1", ex=10)
+    pipe.set.assert_any_call("b", b"2", ex=10)
+    pipe.execute.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_get_or_set_loads_once_when_lock_acquired(redis_cache):
+    """Test the lock winner loads the value and caches it."""
+    redis_cache.redis.get = AsyncMock(return_value=None)
+    redis_cache.redis.set = AsyncMock(return_value=True)
+    redis_cache._release_lock = AsyncMock()
+    loader = AsyncMock(return_value={"id": 1})
+
+    assert await redis_cache.get_or_set("user:a", loader, expire=30) == {"id": 1}
+    loader.assert_awaited_once()
+    lock_call = redis_cache.redis.set.await_args_list[0]
+    token = lock_call.args[1]
+    assert lock_call.args[0] == "lock:user:a"
+    assert lock_call.kwargs == {"nx": True, "ex": 5}
+    redis_cache.redis.set.assert_any_await("user:a", orjson.dumps({"id": 1}), ex=30)
+    # Released by compare-and-delete on our own token, never a plain DEL
+    redis_cache._release_lock.assert_awaited_once_with(keys=["lock:user:a"], args=[token])
+
+@pytest.mark.asyncio
+async def test_get_or_set_waits_for_lock_holder(redis_cache):
+    """Test callers that lose the lock wait for the cached value."""
+    redis_cache.redis.get = AsyncMock(side_effect=[None, None, orjson.dumps({"id": 1})])
+    redis_cache.redis.set = AsyncMock(return_value=None)
+    redis_cache.redis.exists = AsyncMock(return_value=1)
+    loader = AsyncMock()
+
+    assert await redis_cache.get_or_set("user:a", loader) == {"id": 1}
+    loader.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_get_or_set_stops_waiting_when_lock_released(redis_cache):
+    """Test waiters load themselves once the holder gives up without a value."""
+    redis_cache.redis.get = AsyncMock(return_value=None)
+    redis_cache.redis.set = AsyncMock(return_value=None)
+    redis_cache.redis.exists = AsyncMock(return_value=0)
+    loader = AsyncMock(return_value=None)
+
+    with patch("app.core.cache.asyncio.sleep", AsyncMock()) as sleep:
+        assert await redis_cache.get_or_set("user:a", loader) is None
+    loader.assert_awaited_once()
+    sleep.assert_awaited_once()
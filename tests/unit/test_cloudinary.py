@@ -1,50 +1,49 @@
 import pytest
+import cloudinary.uploader
+from dataclasses import dataclass, field
 from unittest.mock import MagicMock, patch
-from fastapi import HTTPException, UploadFile
+from fastapi import HTTPException
+from urllib3 import PoolManager
 
 from app.core.cloudinary import upload_avatar
-from app.models.user import User
+from app.core.config import settings
 
-@pytest.fixture
-def mock_user():
-    return User(
-        id=1,
-        email="test@example.com",
-        hashed_password="hashed_password",
-        is_active=True,
-        is_verified=True
-    )
+@dataclass
+class _Upload:
+    """The parts of UploadFile that upload_avatar reads."""
+    filename: str
+    content_type: str
+    file: MagicMock = field(default_factory=MagicMock)
 
 @pytest.fixture
 def mock_file():
     """Create a mock file for testing."""
-    mock = MagicMock(spec=UploadFile)
-    mock.filename = "test.jpg"
-    mock.content_type = "image/jpeg"
-    mock.file = MagicMock()
-    return mock
+    return _Upload("test.jpg", "image/jpeg")
+
+@pytest.fixture
+def mock_upload():
+    """Patch the Cloudinary upload call."""
+    with patch("cloudinary.uploader.upload") as mock:
+        yield mock
 
 @pytest.mark.asyncio
-async def test_upload_avatar_success(mock_file):
+async def test_upload_avatar_success(mock_file, mock_upload):
     """Test successful avatar upload."""
-    with patch("cloudinary.uploader.upload") as mock_upload:
-        mock_upload.return_value = {"secure_url": "https://example.com/avatar.jpg"}
-        
-        result = await upload_avatar(mock_file)
-        assert result == "https://example.com/avatar.jpg"
-        mock_upload.assert_called_once_with(
-            mock_file.file,
-            folder="avatars",
-            resource_type="auto"
-        )
+    mock_upload.return_value = {"secure_url": "https://example.com/avatar.jpg"}
+    
+    result = await upload_avatar(mock_file)
+    assert result == "https://example.com/avatar.jpg"
+    mock_upload.assert_called_once_with(
+        mock_file.file,
+        folder="avatars",
+        resource_type="auto"
+    )
+    mock_file.file.seek.assert_called_once_with(0)
 
 @pytest.mark.asyncio
 async def test_upload_avatar_invalid_file_type():
     """Test avatar upload with invalid file type."""
-    invalid_file = MagicMock(spec=UploadFile)
-    invalid_file.filename = "test.txt"
-    invalid_file.content_type = "text/plain"
-    invalid_file.file = MagicMock()
+    invalid_file = _Upload("test.txt", "text/plain")
 
     with pytest.raises(HTTPException) as exc_info:
         await upload_avatar(invalid_file)
@@ -53,13 +52,21 @@ async def test_upload_avatar_invalid_file_type():
     assert "Failed to upload avatar" in str(exc_info.value.detail)
 
 @pytest.mark.asyncio
-async def test_upload_avatar_cloudinary_error(mock_file):
+async def test_upload_avatar_cloudinary_error(mock_file, mock_upload):
     """Test avatar upload with Cloudinary error."""
-    with patch("cloudinary.uploader.upload") as mock_upload:
-        mock_upload.side_effect = Exception("Cloudinary error")
+    mock_upload.side_effect = Exception("Cloudinary error")
 
-        with pytest.raises(HTTPException) as exc_info:
-            await upload_avatar(mock_file)
-        
-        assert exc_info.value.status_code == 500
-        assert "Failed to upload avatar" in str(exc_info.value.detail) 
\ No newline at end of file
+    with pytest.raises(HTTPException) as exc_info:
+        await upload_avatar(mock_file)
+    
+    assert exc_info.value.status_code == 500
+    assert "Failed to upload avatar" in str(exc_info.value.detail)
+
+def test_upload_connection_pool_size():
+    """Test Cloudinary uploads share a pool sized for concurrent uploads.
+    
+    The pool is swapped in through the SDK's private uploader._http, so this
+    fails if an SDK upgrade renames or stops using it.
+    """
+    assert isinstance(cloudinary.uploader._http, PoolManager)
+    assert cloudinary.uploader._http.connection_pool_kw["maxsize"] == settings.CLOUDINARY_POOL_MAXSIZE
@@ -0,0 +1,81 @@
+"""Unit tests for contact query helpers."""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import bindparam, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.api.contacts import CONTACT_COLUMNS, SEARCH_TEXT, _etag_matches, birthday_window, update_contact
+from app.models.contact import Contact as ContactModel
+from app.schemas.contact import Contact, ContactUpdate
+
+
+def _compile(expr) -> str:
+    return str(
+        expr.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+def test_birthday_window_single_range():
+    """Test a window within one year is a single half-open range."""
+    sql = _compile(birthday_window(date(2024, 3, 10), days=7))
+    assert "birthday_md >= 310" in sql
+    assert "birthday_md < 318" in sql
+    assert " OR " not in sql
+
+
+def test_birthday_window_wraps_new_year():
+    """Test a window crossing the new year is split into two ranges."""
+    sql = _compile(birthday_window(date(2024, 12, 28), days=7))
+    assert "birthday_md >= 1228" in sql
+    assert "birthday_md < 105" in sql
+    assert " OR " in sql
+
+
+def test_contact_columns_cover_schema():
+    """Test the projected list columns are exactly the Contact schema fields."""
+    assert {column.key for column in CONTACT_COLUMNS} == set(Contact.model_fields)
+
+
+def test_search_text_matches_trigram_index():
+    """Test the search expression is the one covered by the trigram index.
+    
+    Compiled as asyncpg sends it, without inlining binds: a separator sent
+    as a $n parameter would stop the planner from matching the index.
+    """
+    index = next(i for i in ContactModel.__table__.indexes if i.name == "ix_contact_search_trgm")
+    index_sql = index.expressions[0].element.name
+    stmt = select(ContactModel.id).where(SEARCH_TEXT.ilike(bindparam("search_pattern")))
+    sql = str(stmt.compile(dialect=asyncpg.dialect()))
+    where = sql.split("WHERE ", 1)[1].replace("contacts.", "")
+    assert where == f"{index_sql} ILIKE $1::VARCHAR"
+
+
+@pytest.mark.parametrize(
+    "header", ['"abc"', 'W/"abc"', '"x", W/"abc"', "*"]
+)
+def test_etag_matches_weakly(header):
+    """Test If-None-Match uses weak comparison and honours the wildcard."""
+    assert _etag_matches('"abc"', header)
+
+
+@pytest.mark.parametrize("header", [None, "", '"abd"', 'W/"x"'])
+def test_etag_mismatch(header):
+    """Test other or missing tags don't match."""
+    assert not _etag_matches('"abc"', header)
+
+
+@pytest.mark.asyncio
+async def test_update_contact_reraises_other_integrity_errors(mock_db, mock_user):
+    """Test only the per-user email index is reported as a duplicate email."""
+    error = IntegrityError("UPDATE contacts ...", {}, Exception("foreign key violation"))
+    mock_db.execute.side_effect = error
+
+    with pytest.raises(IntegrityError):
+        await update_contact(1, ContactUpdate(first_name="X"), mock_db, mock_user)
+    mock_db.rollback.assert_awaited_once()
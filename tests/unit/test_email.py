@@ -0,0 +1,92 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiosmtplib
+
+from app.core.email import SMTPPool, send_password_reset_email, send_raw_email, send_verification_email
+
+def _mock_smtp():
+    smtp = MagicMock()
+    smtp.is_connected = True
+    smtp.connect = AsyncMock()
+    smtp.login = AsyncMock()
+    smtp.sendmail = AsyncMock()
+    smtp.quit = AsyncMock()
+    return smtp
+
+def test_send_verification_email_queues_send():
+    """Test the verification email is built now and sent in the background."""
+    background_tasks = MagicMock()
+
+    send_verification_email(background_tasks, "user@example.com", "token123")
+
+    background_tasks.add_task.assert_called_once()
+    args, kwargs = background_tasks.add_task.call_args
+    assert args == (send_raw_email,)
+    assert kwargs["to_email"] == "user@example.com"
+    assert b"\r\nTo: user@example.com\r\n" in kwargs["message"]
+    assert b"Subject: Email Verification" in kwargs["message"]
+    assert b"/auth/verify-email/token123" in kwargs["message"]
+
+def test_send_password_reset_email_queues_send():
+    """Test the reset email is built now and sent in the background."""
+    background_tasks = MagicMock()
+
+    send_password_reset_email(background_tasks, "user@example.com", "token123")
+
+    args, kwargs = background_tasks.add_task.call_args
+    assert args == (send_raw_email,)
+    assert b"Subject: Password Reset Request" in kwargs["message"]
+    assert b"reset-password?token=token123" in kwargs["message"]
+
+def test_prebuilt_email_escapes_url():
+    """Test a custom URL is escaped like the template would escape it."""
+    background_tasks = MagicMock()
+
+    send_password_reset_email(
+        background_tasks, "user@example.com", "t", reset_url="http://x/?a=1&b=2"
+    )
+
+    _, kwargs = background_tasks.add_task.call_args
+    assert b'href="http://x/?a=1&amp;b=2"' in kwargs["message"]
+
+@pytest.mark.asyncio
+async def test_smtp_pool_reuses_connection():
+    """Test consecutive messages share one logged-in connection."""
+    smtp = _mock_smtp()
+    pool = SMTPPool(size=1)
+
+    with patch("app.core.email.aiosmtplib.SMTP", return_value=smtp) as mock_smtp_cls:
+        await pool.sendmail("user@example.com", ["to@example.com"], b"first")
+        await pool.sendmail("user@example.com", ["to@example.com"], b"second")
+
+    mock_smtp_cls.assert_called_once()
+    smtp.login.assert_awaited_once()
+    assert smtp.sendmail.await_count == 2
+
+@pytest.mark.asyncio
+async def test_smtp_pool_drops_failed_connection():
+    """Test a connection that failed to send is not reused."""
+    broken, fresh = _mock_smtp(), _mock_smtp()
+    broken.sendmail.side_effect = aiosmtplib.SMTPRecipientsRefused([])
+    pool = SMTPPool(size=1)
+
+    with patch("app.core.email.aiosmtplib.SMTP", side_effect=[broken, fresh]):
+        with pytest.raises(aiosmtplib.SMTPRecipientsRefused):
+            await pool.sendmail("user@example.com", ["to@example.com"], b"first")
+        await pool.sendmail("user@example.com", ["to@example.com"], b"second")
+
+    broken.quit.assert_awaited_once()
+    fresh.sendmail.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_smtp_pool_close_quits_idle_connections():
+    """Test closing the pool ends idle sessions with QUIT."""
+    smtp = _mock_smtp()
+    pool = SMTPPool(size=1)
+
+    with patch("app.core.email.aiosmtplib.SMTP", return_value=smtp):
+        await pool.sendmail("user@example.com", ["to@example.com"], b"first")
+    await pool.close()
+
+    smtp.quit.assert_awaited_once()
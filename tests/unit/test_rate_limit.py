@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.rate_limit import RateLimitMiddleware
+
+def _middleware(script_result, trusted_proxies=()):
+    app = AsyncMock()
+    redis_client = MagicMock()
+    script = AsyncMock(return_value=script_result)
+    redis_client.register_script.return_value = script
+    middleware = RateLimitMiddleware(
+        app,
+        redis_client=redis_client,
+        rules={"/api/v1/contacts": (10, 60)},
+        trusted_proxies=trusted_proxies,
+    )
+    return middleware, app, script
+
+def _scope(path, client="1.2.3.4", headers=()):
+    return {"type": "http", "path": path, "client": (client, 1234), "headers": list(headers)}
+
+@pytest.mark.asyncio
+async def test_request_under_limit_passes_through():
+    """Test requests within the limit reach the application."""
+    middleware, app, script = _middleware([3, 50_000])
+    await middleware(_scope("/api/v1/contacts/"), AsyncMock(), AsyncMock())
+
+    app.assert_awaited_once()
+    script.assert_awaited_once_with(keys=["ratelimit:/api/v1/contacts:1.2.3.4"], args=[60_000])
+
+@pytest.mark.asyncio
+async def test_request_over_limit_is_rejected():
+    """Test requests over the limit get 429 without reaching the application."""
+    middleware, app, _ = _middleware([11, 1_500])
+    send = AsyncMock()
+    await middleware(_scope("/api/v1/contacts/1"), AsyncMock(), send)
+
+    app.assert_not_awaited()
+    start = send.await_args_list[0].args[0]
+    assert start["status"] == 429
+    assert (b"retry-after", b"2") in start["headers"]
+
+@pytest.mark.asyncio
+async def test_unmatched_path_skips_redis():
+    """Test paths without a rule are not counted."""
+    middleware, app, script = _middleware([11, 1_500])
+    await middleware(_scope("/api/v1/auth/login"), AsyncMock(), AsyncMock())
+
+    app.assert_awaited_once()
+    script.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_prefix_matches_whole_segments():
+    """Test a rule doesn't cover paths that only share its leading characters."""
+    middleware, app, script = _middleware([11, 1_500])
+    await middleware(_scope("/api/v1/contactsXYZ"), AsyncMock(), AsyncMock())
+    script.assert_not_awaited()
+
+    await middleware(_scope("/api/v1/contacts"), AsyncMock(), AsyncMock())
+    script.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_redis_error_fails_open():
+    """Test requests pass through when Redis is unavailable."""
+    middleware, app, script = _middleware(None)
+    script.side_effect = ConnectionError("redis down")
+    await middleware(_scope("/api/v1/contacts/"), AsyncMock(), AsyncMock())
+
+    app.assert_awaited_once()
+
+def test_client_ip_from_trusted_proxy():
+    """Test X-Forwarded-For is honoured only from trusted proxies."""
+    middleware, _, _ = _middleware(None, trusted_proxies=["10.0.0.1"])
+    headers = [(b"x-forwarded-for", b"9.9.9.9, 5.6.7.8")]
+
+    assert middleware._client_ip(_scope("/", client="10.0.0.1", headers=headers)) == "5.6.7.8"
+    assert middleware._client_ip(_scope("/", client="7.7.7.7", headers=headers)) == "7.7.7.7"
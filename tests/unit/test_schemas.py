@@ -0,0 +1,31 @@
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.contact import ContactCreate, ContactUpdate
+
+CONTACT = {
+    "first_name": "John",
+    "last_name": "Doe",
+    "phone": "+1234567890",
+    "birthday": "1990-01-01",
+}
+
+def test_contact_email_accepted():
+    """Test a well-formed contact email passes validation unchanged."""
+    contact = ContactCreate(**CONTACT, email="john.doe@example.com")
+    assert contact.email == "john.doe@example.com"
+
+@pytest.mark.parametrize("email", ["john.doe", "john@", "john doe@example.com", "@example.com", "john@example.com\n"])
+def test_contact_email_rejected(email):
+    """Test malformed contact emails are rejected."""
+    with pytest.raises(ValidationError):
+        ContactCreate(**CONTACT, email=email)
+
+def test_contact_email_domain_lowercased():
+    """Test the email domain is normalised like EmailStr does."""
+    contact = ContactCreate(**CONTACT, email="John.Doe@EXAMPLE.com")
+    assert contact.email == "John.Doe@example.com"
+
+def test_contact_update_email_optional():
+    """Test the email can be omitted on update."""
+    assert ContactUpdate().email is None